@@ -0,0 +1,251 @@
+"""Per-stage benchmark of the physical-task pipeline, with no camera needed.
+
+Runs every frame of a fixture through the same stages as a live task: capture,
+ROI cropping, colour conversion, pose.process on the crop, mirroring
+(landmarks, which replaced the frame flip), predicate evaluation and preview
+encoding. Each stage reports p50/p95/p99 latency and the FPS it alone would
+allow. An end-to-end pass through GestureEngine with motion gating and ROI
+tracking is timed as well. Results are written as JSON; ``--compare`` prints
+the change against an earlier run.
+
+Frames are synthetic noise by default. Any recorded clip or image directory
+works too, e.g. a video saved with an attempt under traces/. Noise never
+contains a person, so the ROI and predicate stages are driven by a landmark
+trace instead of the model's output: a generated attempt at the task by
+default, or a stored trace with ``--trace`` (use the one recorded with the
+clip). Traces drive the tracker in camera orientation, as the clip was
+recorded, and are mirrored for the predicate like live landmarks. Pose timings on frames without a person only cover the person
+detector; the run warns when the model found nobody.
+
+Usage:
+    python benchmarks/bench_pipeline.py --frames 300
+    python benchmarks/bench_pipeline.py --source traces/raise_hands_....mp4 --trace raise_hands_... --task raise_hands
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline_20260101_120000.json
+"""
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from landmark_fixtures import gesture_trace
+from physical_tasks import PHYSICAL_TASKS
+from utils.capture_utils import SyntheticSource, open_frame_source
+from utils.gesture_utils import GestureEngine
+from utils.preview_utils import JpegEncoder
+from utils.trace_utils import TRACE_DIR, load_trace, read_index
+from utils.vision_utils import (
+    X, Y, MotionGate, PoseDetector, RoiTracker, landmarks_to_array, mirror_landmarks, reuse_buffer,
+)
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+STAGES = ("capture", "roi", "color", "pose", "mirror", "predicate", "preview")
+
+def noise_source(frames, width, height, fps=30.0):
+    rng = np.random.default_rng(0)
+    pool = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    return SyntheticSource((pool[i % len(pool)] for i in range(frames)), fps=fps)
+
+def open_fixture(args):
+    if args.source == "synthetic":
+        return noise_source(args.frames, args.width, args.height)
+    return open_frame_source(args.source)
+
+def open_trace(args):
+    """(timestamps, landmarks) in camera orientation driving the ROI and predicate stages."""
+    if args.trace:
+        entry = next((e for e in read_index(args.traces) if e["id"] == args.trace), None)
+        if entry is None:
+            raise SystemExit(f"Trace {args.trace!r} is not in {args.traces}")
+        timestamps, landmarks = load_trace(args.trace, args.traces, mmap=False)
+        if entry.get("mirrored", PHYSICAL_TASKS[entry["task"]].mirror):
+            landmarks = mirror_landmarks(landmarks)
+    else:
+        timestamps, landmarks = gesture_trace(args.task, args.frames)
+    if len(timestamps) < 2:
+        raise SystemExit(f"Trace {args.trace!r} is too short to drive the benchmark")
+    return timestamps, landmarks
+
+def trace_frame(trace, i):
+    """Timestamp and landmarks (None when nobody was detected) of frame ``i``, looping the trace."""
+    timestamps, landmarks = trace
+    n = len(timestamps)
+    period = timestamps[-1] - timestamps[0] + (timestamps[-1] - timestamps[0]) / (n - 1)
+    row = landmarks[i % n]
+    return float(timestamps[i % n] + (i // n) * period), None if np.isnan(row[0, 0]) else row.copy()
+
+def to_crop(tracker, landmarks):
+    """Full-frame landmarks as the model would report them inside the tracker's last crop."""
+    if landmarks is None:
+        return None
+    x0, y0, cw, ch, w, h = tracker._crop
+    landmarks[:, X] = (landmarks[:, X] * w - x0) / cw
+    landmarks[:, Y] = (landmarks[:, Y] * h - y0) / ch
+    return landmarks
+
+def summarize(samples):
+    ms = 1000 * np.asarray(samples)
+    mean = float(ms.mean())
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": mean,
+        "fps": 1000 / mean if mean > 0 else float("inf"),
+    }
+
+def run_stages(args, spec, trace):
+    """Time each stage separately over every frame of the fixture.
+
+    The model's own detections are only counted; the ROI tracker and the
+    predicate are fed the trace, so they do real work even on noise frames.
+    """
+    detector = PoseDetector()
+    detector.warm_up((args.height, args.width, 3))
+    tracker = RoiTracker()
+    engine = GestureEngine(spec, detector=None)
+    encoder = JpegEncoder(mirror=spec.mirror)
+    timings = {stage: [] for stage in STAGES}
+    counts = {"pose_detections": 0, "trace_detections": 0, "predicate_hits": 0}
+    rgb = None
+
+    cap = open_fixture(args)
+    clock = time.perf_counter
+    while len(timings["capture"]) < args.frames:
+        i = len(timings["capture"])
+        timestamp, tracked = trace_frame(trace, i)
+        t0 = clock()
+        ret, frame = cap.read()
+        t1 = clock()
+        if not ret:
+            break
+        roi = tracker.crop(frame)
+        tracker.to_full_frame(to_crop(tracker, None if tracked is None else tracked.copy()))
+        t2 = clock()
+        rgb = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB, dst=reuse_buffer(rgb, roi.shape))
+        t3 = clock()
+        landmarks = landmarks_to_array(detector.pose.process(rgb).pose_landmarks)
+        t4 = clock()
+        evaluated = mirror_landmarks(tracked) if spec.mirror else tracked
+        t5 = clock()
+        hit = engine.evaluate(timestamp, evaluated)
+        t6 = clock()
+        encoder.encode(frame)
+        t7 = clock()
+        for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5, t7 - t6)):
+            timings[stage].append(elapsed)
+        counts["pose_detections"] += landmarks is not None
+        counts["trace_detections"] += tracked is not None
+        counts["predicate_hits"] += bool(hit)
+    cap.release()
+    detector.close()
+    if not timings["capture"]:
+        raise SystemExit(f"No frames could be read from {args.source!r}")
+
+    stages = {stage: summarize(timings[stage]) for stage in STAGES}
+    per_frame = np.sum([timings[stage] for stage in STAGES], axis=0)
+    return stages, summarize(per_frame), len(per_frame), {**counts, **tracker.stats()}
+
+def run_end_to_end(args, spec):
+    """The real task loop, with the motion gate and ROI tracker the app uses."""
+    detector = PoseDetector(motion_gate=MotionGate(), roi_tracker=RoiTracker())
+    detector.warm_up((args.height, args.width, 3))
+    detector.roi_tracker.reset()
+    encoder = JpegEncoder(mirror=spec.mirror)
+    # Never stop early, so every run processes the same frames
+    spec = dataclasses.replace(spec, hold_s=float("inf"), timeout_s=float("inf"))
+    cap = open_fixture(args)
+    start = time.perf_counter()
+    result = GestureEngine(spec, detector, on_frame=encoder.encode).run(cap)
+    elapsed = time.perf_counter() - start
+    cap.release()
+    detector.close()
+    return {
+        "frames": result["frames"],
+        "fps": result["frames"] / elapsed if elapsed > 0 else 0.0,
+        "avg_inference_ms": result["avg_inference_ms"],
+        "skip_ratio": result.get("skip_ratio", 0.0),
+        "tracked_frames": result.get("tracked_frames", 0),
+    }
+
+def compare(current, baseline):
+    print(f"\nChange against {baseline['meta']['created']} ({baseline['meta']['source']}):")
+    rows = [(stage, baseline["stages"].get(stage), current["stages"][stage]) for stage in STAGES]
+    rows.append(("per frame", baseline.get("per_frame"), current["per_frame"]))
+    for name, old, new in rows:
+        if not old:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = 100 * (new[key] - old[key]) / old[key] if old[key] else 0.0
+            print(f"  {name:10s} {key:7s} {old[key]:8.3f} -> {new[key]:8.3f}  ({change:+6.1f}%)")
+    old_fps, new_fps = baseline["end_to_end"]["fps"], current["end_to_end"]["fps"]
+    print(f"  end-to-end fps {old_fps:8.1f} -> {new_fps:8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="synthetic", help="'synthetic', a video file or an image directory")
+    parser.add_argument("--task", default="raise_hands", choices=sorted(PHYSICAL_TASKS))
+    parser.add_argument("--trace", help="stored trace id driving the ROI and predicate stages "
+                                        "(default: a generated attempt at --task)")
+    parser.add_argument("--traces", default=TRACE_DIR, help="directory of stored traces")
+    parser.add_argument("--frames", type=int, default=300, help="maximum number of frames to process")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--output", help="where to write the JSON results (default: benchmarks/results/)")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    spec = PHYSICAL_TASKS[args.task]
+    stages, per_frame, frames, counts = run_stages(args, spec, open_trace(args))
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "source": args.source,
+            "task": args.task,
+            "trace": args.trace or "generated",
+            "frames": frames,
+            "resolution": [args.width, args.height] if args.source == "synthetic" else None,
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "mediapipe": mp.__version__,
+            "numpy": np.__version__,
+        },
+        "stages": stages,
+        "per_frame": per_frame,
+        "counts": counts,
+        "end_to_end": run_end_to_end(args, spec),
+    }
+
+    print(f"{frames} frames from {args.source} ({args.task})")
+    for name, row in (*stages.items(), ("per frame", per_frame)):
+        print(f"  {name:10s} p50 {row['p50_ms']:8.3f}  p95 {row['p95_ms']:8.3f}  "
+              f"p99 {row['p99_ms']:8.3f} ms  {row['fps']:9.1f} fps")
+    e2e = results["end_to_end"]
+    print(f"  end-to-end {e2e['fps']:.1f} fps ({e2e['skip_ratio']:.0%} of frames skipped by the motion gate)")
+    print(f"  trace: {counts['trace_detections']} frames with a person, {counts['predicate_hits']} predicate hits, "
+          f"{counts['box_moves']} ROI box moves")
+    if not counts["pose_detections"]:
+        print("  warning: the model found nobody in the fixture, so pose timings only cover the "
+              "person detector and end-to-end never tracked an ROI; use a recorded clip for those")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
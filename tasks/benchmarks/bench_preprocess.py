@@ -0,0 +1,147 @@
+"""Micro-benchmark of the per-frame preprocessing done around pose inference.
+
+Compares the old path (flip the frame, convert a fresh RGB copy, downsize and
+encode the flipped frame for preview) with the buffered one (convert into a
+reused RGB buffer, mirror landmarks, flip only the small preview image).
+
+The ROI cases follow a person drifting across the frame. One crops the exact
+box around them, so the input shape changes from frame to frame; the other
+uses RoiTracker, whose crops always have one shape and reuse their buffers.
+
+Usage:
+    python benchmarks/bench_preprocess.py --frames 300 --width 1280 --height 720
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+from utils.vision_utils import NUM_LANDMARKS, VISIBILITY, X, Y, RoiTracker, mirror_landmarks, reuse_buffer
+
+PREVIEW_WIDTH = 320
+ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 70]
+ROI_MAX_SIDE = 320
+
+def flip_pipeline(frame, landmarks):
+    flipped = cv2.flip(frame, 1)
+    rgb = cv2.cvtColor(flipped, cv2.COLOR_BGR2RGB)
+    h, w = flipped.shape[:2]
+    small = cv2.resize(flipped, (PREVIEW_WIDTH, h * PREVIEW_WIDTH // w), interpolation=cv2.INTER_AREA)
+    cv2.imencode(".jpg", small, ENCODE_PARAMS)
+    return rgb, landmarks
+
+class BufferedPipeline:
+    def __init__(self):
+        self.rgb = self.small = self.mirrored = None
+
+    def __call__(self, frame, landmarks):
+        self.rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=reuse_buffer(self.rgb, frame.shape))
+        h, w = frame.shape[:2]
+        size = (PREVIEW_WIDTH, h * PREVIEW_WIDTH // w)
+        self.small = cv2.resize(frame, size, dst=reuse_buffer(self.small, (size[1], size[0], 3)),
+                                interpolation=cv2.INTER_AREA)
+        self.mirrored = cv2.flip(self.small, 1, dst=reuse_buffer(self.mirrored, self.small.shape))
+        cv2.imencode(".jpg", self.mirrored, ENCODE_PARAMS)
+        return self.rgb, mirror_landmarks(landmarks)
+
+def drifting_pose(rng, frames):
+    """Normalised landmarks of a person walking slowly from left to right."""
+    base = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    base[:, X] = rng.uniform(0.15, 0.3, NUM_LANDMARKS)
+    base[:, Y] = rng.uniform(0.2, 0.9, NUM_LANDMARKS)
+    base[:, VISIBILITY] = 1.0
+    poses = np.repeat(base[None], frames, axis=0)
+    poses[:, :, :2] += rng.normal(0, 0.005, (frames, NUM_LANDMARKS, 2))
+    poses[:, :, X] += np.linspace(0.0, 0.5, frames)[:, None]
+    return poses
+
+class ExactRoi:
+    """Crops the exact padded box around the last pose, as RoiTracker used to."""
+    def __init__(self, poses, margin=0.25):
+        self.poses = poses
+        self.margin = margin
+        self.i = 0
+        self.shapes = set()
+
+    def __call__(self, frame, landmarks):
+        h, w = frame.shape[:2]
+        pose = self.poses[self.i % len(self.poses)]
+        self.i += 1
+        lo, hi = pose[:, :2].min(axis=0), pose[:, :2].max(axis=0)
+        pad = (hi - lo) * self.margin
+        lo, hi = np.clip(lo - pad, 0.0, 1.0), np.clip(hi + pad, 0.0, 1.0)
+        roi = frame[int(lo[1] * h):int(np.ceil(hi[1] * h)), int(lo[0] * w):int(np.ceil(hi[0] * w))]
+        scale = ROI_MAX_SIDE / max(roi.shape[:2])
+        if scale < 1.0:
+            roi = cv2.resize(roi, (int(roi.shape[1] * scale), int(roi.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        self.shapes.add(roi.shape)
+        return cv2.cvtColor(roi, cv2.COLOR_BGR2RGB), landmarks
+
+class TrackedRoi:
+    def __init__(self, poses):
+        self.poses = poses
+        self.tracker = RoiTracker(max_side=ROI_MAX_SIDE)
+        self.rgb = None
+        self.i = 0
+        self.shapes = set()
+
+    def __call__(self, frame, landmarks):
+        roi = self.tracker.crop(frame)
+        self.rgb = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB, dst=reuse_buffer(self.rgb, roi.shape))
+        self.shapes.add(roi.shape)
+        # Hand back the pose as the model would report it, relative to the crop
+        pose = self.poses[self.i % len(self.poses)].copy()
+        self.i += 1
+        x0, y0, cw, ch, w, h = self.tracker._crop
+        pose[:, X] = (pose[:, X] * w - x0) / cw
+        pose[:, Y] = (pose[:, Y] * h - y0) / ch
+        self.tracker.to_full_frame(pose)
+        return self.rgb, landmarks
+
+def measure(step, frames, landmarks):
+    step(frames[0], landmarks)  # let buffered steps allocate once
+
+    start = time.perf_counter()
+    for frame in frames:
+        step(frame, landmarks)
+    per_frame_ms = 1000 * (time.perf_counter() - start) / len(frames)
+
+    tracemalloc.start()
+    allocated = 0
+    for frame in frames:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step(frame, landmarks)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return per_frame_ms, allocated / len(frames)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    landmarks = rng.random((NUM_LANDMARKS, 4), dtype=np.float32)
+
+    for name, step in (("flip + copy", flip_pipeline), ("buffered", BufferedPipeline())):
+        ms, allocated = measure(step, frames, landmarks)
+        print(f"{name:12s} {ms:7.3f} ms/frame  {allocated / 1024:9.1f} KiB allocated/frame")
+
+    poses = drifting_pose(rng, args.frames)
+    for name, step in (("roi exact", ExactRoi(poses)), ("roi tracked", TrackedRoi(poses))):
+        ms, allocated = measure(step, frames, landmarks)
+        print(f"{name:12s} {ms:7.3f} ms/frame  {allocated / 1024:9.1f} KiB allocated/frame  "
+              f"{len(step.shapes)} input shapes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Generated landmark traces of a person performing each physical task.
+
+Benchmarks use them where a pose model would need a real person in the frame:
+predicate evaluation and ROI tracking get landmarks that move like an attempt,
+in the same (T, 33, 4) layout and camera orientation (not mirrored) as a
+trace recorded under traces/.
+"""
+import numpy as np
+
+from utils.vision_utils import NUM_LANDMARKS, POSE_LMS, VISIBILITY, X, Y, Z
+
+# Horizontal distance from the body's midline and height of each landmark of
+# a person standing upright and facing the camera, in normalised coordinates.
+# The person's right side is on the left of the image.
+_BODY = {
+    "EYE_INNER": (0.01, 0.20), "EYE": (0.02, 0.20), "EYE_OUTER": (0.03, 0.20), "EAR": (0.045, 0.21),
+    "MOUTH": (0.015, 0.245), "SHOULDER": (0.10, 0.32), "ELBOW": (0.13, 0.45), "WRIST": (0.14, 0.56),
+    "PINKY": (0.145, 0.59), "INDEX": (0.14, 0.60), "THUMB": (0.13, 0.58), "HIP": (0.06, 0.58),
+    "KNEE": (0.065, 0.74), "ANKLE": (0.065, 0.90), "HEEL": (0.07, 0.92), "FOOT_INDEX": (0.06, 0.94),
+}
+_ARM = ("ELBOW", "WRIST", "PINKY", "INDEX", "THUMB")
+_LEG = ("KNEE", "ANKLE", "HEEL", "FOOT_INDEX")
+
+def _index(side, part):
+    return POSE_LMS[f"{side}_{part}"].value
+
+def standing_pose(center_x=0.5):
+    """One (33, 4) frame of a person standing still in the middle of the image."""
+    pose = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+    pose[POSE_LMS.NOSE.value, [X, Y]] = center_x, 0.22
+    for lm in POSE_LMS:
+        if lm.name == "NOSE":
+            continue
+        if lm.name.startswith(("LEFT_", "RIGHT_")):
+            side, part = lm.name.split("_", 1)
+        else:  # MOUTH_LEFT, MOUTH_RIGHT
+            part, side = lm.name.rsplit("_", 1)
+        dx, y = _BODY[part]
+        pose[lm.value, X] = center_x + (dx if side == "LEFT" else -dx)
+        pose[lm.value, Y] = y
+    pose[:, VISIBILITY] = 0.95
+    return pose
+
+def _ramp(t):
+    """0 before 40% of the trace, rising to 1 by 50%, holding until 80%, back to 0 by 90%."""
+    return np.clip(np.minimum((t - 0.4) / 0.1, (0.9 - t) / 0.1), 0.0, 1.0)
+
+def gesture_trace(task, frames=300, fps=30.0, seed=0):
+    """(timestamps, landmarks) of one attempt at ``task``, with nobody in view for the first 5%.
+
+    Every trace but turn_around completes its task under score_trace. The
+    turn's shoulder distance only swings by 0.4 of the frame width, short of
+    the 140/180 its check asks for, so that trace exercises the check
+    without passing it.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(frames) / fps
+    amount = _ramp(np.linspace(0.0, 1.0, frames))[:, None]
+    landmarks = np.repeat(standing_pose()[None], frames, axis=0)
+
+    if task == "raise_hands":
+        for side in ("LEFT", "RIGHT"):
+            arm = [_index(side, part) for part in _ARM]
+            landmarks[:, arm, Y] -= 0.45 * amount
+    elif task == "one_leg":
+        leg = [_index("LEFT", part) for part in _LEG]
+        landmarks[:, leg, Y] -= 0.2 * amount
+    elif task == "turn_around":
+        # Rotate about the vertical axis through the midline
+        angle = np.pi * amount
+        offset = landmarks[:, :, X] - 0.5
+        landmarks[:, :, X] = 0.5 + offset * np.cos(angle)
+        landmarks[:, :, Z] = offset * np.sin(angle)
+    elif task == "frog_jump":
+        landmarks[:, :, Y] -= 0.1 * amount
+    elif task == "kangaroo_jump":
+        landmarks[:, :, X] += 0.12 * amount
+        landmarks[:, :, Y] -= 0.06 * np.sin(np.pi * amount)
+    # stand_still only gets the sensor jitter below
+
+    landmarks[:, :, :2] += rng.normal(0, 0.002, (frames, NUM_LANDMARKS, 2)).astype(np.float32)
+    landmarks[: frames // 20] = np.nan
+    return timestamps, landmarks
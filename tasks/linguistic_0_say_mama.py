@@ -6,11 +6,14 @@ import streamlit as st
 from utils.voice_utils import record_and_transcribe
 import re
 
+# Recognizer vocabulary; everything else the child says decodes as [unk]
+GRAMMAR = {"ma", "mama", "mumma", "mummy", "papa", "dada"}
+
 def task():
     st.write("Say ‘ma‑ma’")
     if st.button("🎙️ Start Recording"):
         with st.spinner("Listening..."):
-            transcript = record_and_transcribe()
+            transcript = record_and_transcribe(targets={"ma", "mama", "mumma", "mummy"}, grammar=GRAMMAR)
         st.write(f"Transcription: **{transcript}**")
         if re.search(r'\b(ma|mama|mumma|mummy)\b', transcript):
             st.success("Great! ✅")
@@ -5,12 +5,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 from utils.voice_utils import record_and_transcribe
 
+# Recognizer vocabulary; everything else the child says decodes as [unk]
+GRAMMAR = {"apple", "an", "it's", "a", "ball", "orange", "banana"}
+
 def task():
     st.image("https://images.unsplash.com/photo-1567306226416-28f0efdc88ce?w=200", width=200)
     st.write("What is this?")
     if st.button("🎙️ Start Recording"):
         with st.spinner("Listening..."):
-            transcript = record_and_transcribe()
+            transcript = record_and_transcribe(targets={"apple"}, grammar=GRAMMAR)
         st.write(f"Transcription: **{transcript}**")
         if "apple" in transcript:
             st.success("Great! ✅")
@@ -5,12 +5,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 from utils.voice_utils import record_and_transcribe
 
+# Recognizer vocabulary; "cat" itself is included so it is not heard as a rhyme
+GRAMMAR = {"bat", "hat", "mat", "rat", "sat", "fat", "cat"}
+
 def task():
     st.write("Say a word that rhymes with ‘cat’")
     rhymes = {"bat", "hat", "mat", "rat", "sat", "fat"}
     if st.button("🎙️ Start Recording"):
         with st.spinner("Listening..."):
-            transcript = record_and_transcribe()
+            transcript = record_and_transcribe(targets=rhymes, grammar=GRAMMAR)
         st.write(f"Transcription: **{transcript}**")
         if set(transcript.split()) & rhymes:
             st.success("Nice rhyme! ✅")
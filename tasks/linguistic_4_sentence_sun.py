@@ -5,11 +5,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import streamlit as st
 from utils.voice_utils import record_and_transcribe
 
+# Free-form sentence: decode with the full vocabulary
+GRAMMAR = None
+
 def task():
     st.write("Make a sentence using the word ‘sun’")
     if st.button("🎙️ Start Recording"):
         with st.spinner("Listening..."):
-            transcript = record_and_transcribe()
+            transcript = record_and_transcribe(grammar=GRAMMAR)
         st.write(f"Transcription: **{transcript}**")
         if "sun" in transcript and len(transcript.split()) >= 3:
             st.success("Nice sentence! ✅")
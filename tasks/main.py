@@ -1,8 +1,10 @@
 import sys
 import os
 import streamlit as st
-from utils.voice_utils import record_and_transcribe
-from utils.vision_utils import PoseDetector, wrists_above_head
+from utils.voice_utils import record_and_transcribe, get_model_registry
+from utils.scheduler_utils import get_pose_scheduler
+from utils.capture_utils import CameraSession
+from utils.preview_utils import DEFAULT_PREVIEW_FPS
 import re
 import time
 import cv2
@@ -33,12 +35,12 @@ from linguistic_3_fill_blank import task as linguistic_task_3
 from linguistic_4_sentence_sun import task as linguistic_task_4
 from linguistic_5_story_kite import task as linguistic_task_5
 
-from physical_0_raise_hands import task as physical_task_0
-from physical_1_one_leg import task as physical_task_1
-from physical_2_turn_around import task as physical_task_2
-from physical_3_stand_still import task as physical_task_3
-from physical_4_frog_jump import task as physical_task_4
-from physical_5_kangaroo_jump import task as physical_task_5
+from physical_0_raise_hands import start as physical_task_0
+from physical_1_one_leg import start as physical_task_1
+from physical_2_turn_around import start as physical_task_2
+from physical_3_stand_still import start as physical_task_3
+from physical_4_frog_jump import start as physical_task_4
+from physical_5_kangaroo_jump import start as physical_task_5
 
 from intelligence_tasks import INTELLIGENCE_QUESTIONS
 
@@ -204,6 +206,14 @@ if 'user_info' not in st.session_state:
         'location': ''
     }
 
+# Start the pose workers shared by all sessions once per server process
+get_pose_scheduler()
+
+# Load the speech model in the background so the first linguistic task doesn't wait for it
+if "vosk_preloaded" not in st.session_state:
+    get_model_registry().preload()
+    st.session_state.vosk_preloaded = True
+
 
 def select_age_group():
     st.title("Child Development Assessment")
@@ -373,20 +383,31 @@ def perform_physical_task():
                 </div>
             """, unsafe_allow_html=True)
 
+        st.checkbox("🎥 Save a video of the attempt for clinical review", key="record_physical_video")
+
         task_func = physical_tasks.get(st.session_state.age_group)
         if task_func:
             score = task_func()
-            st.session_state.scores['physical'] = score if score else 0
+            if score is not None:
+                st.session_state.scores['physical'] = score
 
         st.markdown("</div>", unsafe_allow_html=True)
 
-        # Navigation buttons
-        col1, col2 = st.columns(2)
+        # Navigation buttons; the attempt runs in the background, so these respond at once
+        runner = st.session_state.get('physical_runner')
+        col1, col2, col3 = st.columns(3)
         with col1:
-            if st.button("🔄 Try Again"):
+            if st.button("⏹ Cancel", disabled=runner is None or runner.done):
+                runner.cancel()
                 st.rerun()
         with col2:
+            if st.button("🔄 Try Again"):
+                stop_physical_runner()
+                st.rerun()
+        with col3:
             if st.button("Next Task →"):
+                stop_physical_runner()
+                release_session_camera()
                 st.session_state.current_task = 2
                 st.rerun()
 
@@ -1116,16 +1137,69 @@ def generate_enhanced_ai_report_from_pdf(pdf_path):
         st.error(f"AI report generation failed: {str(e)}")
         return None, None, {}
 # Helper functions for running tasks
+def get_session_camera():
+    """The session's camera, opened and warmed up once and reused by every attempt."""
+    if 'camera' not in st.session_state:
+        st.session_state.camera = CameraSession(0)
+    return st.session_state.camera
+
+
+def release_session_camera():
+    camera = st.session_state.pop('camera', None)
+    if camera is not None:
+        camera.close()
+
+
+def stop_physical_runner():
+    """Cancel the session's running physical attempt, if any, without waiting for it."""
+    runner = st.session_state.pop('physical_runner', None)
+    if runner is not None:
+        runner.cancel()
+
+
+@st.fragment(run_every=1.0 / DEFAULT_PREVIEW_FPS)
+def show_physical_progress(runner):
+    """Poll the background attempt: live preview and countdown until it finishes."""
+    if runner.done:
+        # Re-render the whole page once so the result and score are recorded
+        st.rerun()
+    if not runner.ready:
+        st.caption("📷 Getting the camera ready...")
+        return
+    jpeg = runner.preview()
+    if jpeg is not None:
+        st.image(jpeg)
+    st.caption(f"⏱ {runner.remaining_s:.0f}s left")
+
+
 def run_physical_task(task_id, task_function, task_name):
-    """Execute a physical task and record results"""
+    """Start a physical task in the background and record its result once it finishes.
+
+    Returns the score when the attempt is over and None while it is still running.
+    """
     try:
         st.markdown(f"<h4 style='text-align: center;'>{task_name}</h4>", unsafe_allow_html=True)
 
-        # Run the task
-        result = task_function()
+        runner = st.session_state.get('physical_runner')
+        if runner is None or st.session_state.get('physical_runner_task') != task_id:
+            stop_physical_runner()
+            runner = st.session_state.physical_runner = task_function(
+                get_session_camera().lease(),
+                record_video=st.session_state.get('record_physical_video', False),
+            )
+            st.session_state.physical_runner_task = task_id
+
+        st.write(runner.spec.prompt)
+        if not runner.done:
+            show_physical_progress(runner)
+            return None
+
+        if runner.error is not None:
+            raise runner.error
+        result = runner.result
 
         # Process result
-        if result:
+        if result and not result.get('cancelled'):
             score = result.get('score', 0)
             completed = result.get('completed', False)
 
@@ -1135,8 +1209,11 @@ def run_physical_task(task_id, task_function, task_name):
                 'task_name': task_name,
                 'score': score,
                 'completed': completed,
-                'timestamp': time.time(),
-                'age_group': st.session_state.age_group
+                'timestamp': runner.finished_at,
+                'age_group': st.session_state.age_group,
+                'trace_id': result.get('trace_id'),
+                'video': result.get('video'),
+                'video_dropped_frames': result.get('video_dropped', 0)
             }
 
             # Update or append result
@@ -1153,11 +1230,14 @@ def run_physical_task(task_id, task_function, task_name):
 
             # Show feedback
             if completed:
-                st.success(f"Great job! Task completed successfully! Score: {score}")
+                st.success(f"{runner.spec.success_message} Score: {score}")
             else:
-                st.info(f"Good effort! Keep practicing. Score: {score}")
+                st.info(f"⏰ Time's up! Good effort, keep practicing. Score: {score}")
 
             return score
+        elif result and result.get('cancelled'):
+            st.warning("Task cancelled. Press Try Again to start over.")
+            return None
         else:
             st.error("Task could not be completed. Please try again.")
             return 0
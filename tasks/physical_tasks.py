@@ -0,0 +1,58 @@
+from utils.gesture_utils import GestureSpec
+from utils.vision_utils import (
+    wrists_above_head, one_leg_up, torso_angle, torso_rotation, holding_still,
+    vertical_jump, forward_jump, nose_x, nose_y,
+)
+
+PHYSICAL_TASKS = {
+    "raise_hands": GestureSpec(
+        name="raise_hands",
+        prompt="🖐️ Raise both hands up high!",
+        success_message="Great job! Both hands above head 🎉",
+        check=wrists_above_head,
+    ),
+    "one_leg": GestureSpec(
+        name="one_leg",
+        prompt="🦩 Lift one leg like a bird!",
+        success_message="Awesome balance! One leg up 🦩",
+        check=one_leg_up,
+    ),
+    "turn_around": GestureSpec(
+        name="turn_around",
+        prompt="🌀 Turn around once!",
+        success_message="Nice spin! Full turn detected 🌀",
+        check=torso_rotation,
+        baseline=torso_angle,
+        baseline_s=0.3,
+        params={"threshold": 140},
+    ),
+    "stand_still": GestureSpec(
+        name="stand_still",
+        prompt="🕴 Stand still like a statue for 2 s!",
+        success_message="Statue mode complete! 🗿",
+        check=holding_still,
+        velocity=True,
+        params={"max_speed": 0.2},
+        exit_params={"max_speed": 0.3},
+        hold_s=2.0,
+        release_s=0.3,
+    ),
+    "frog_jump": GestureSpec(
+        name="frog_jump",
+        prompt="🐸 Jump like a frog!",
+        success_message="Boing! Frog jump detected 🐸",
+        check=vertical_jump,
+        baseline=nose_y,
+        baseline_s=0.5,
+        params={"jump_thresh": 0.05},
+    ),
+    "kangaroo_jump": GestureSpec(
+        name="kangaroo_jump",
+        prompt="🦘 Do a big kangaroo jump forward!",
+        success_message="Hop hop! Kangaroo jump detected 🦘",
+        check=forward_jump,
+        baseline=nose_x,
+        baseline_s=0.5,
+        params={"jump_thresh": 0.07},
+    ),
+}
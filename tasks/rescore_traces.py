@@ -0,0 +1,75 @@
+"""Re-score stored landmark traces with new thresholds, without running the pose model.
+
+Usage:
+    python rescore_traces.py --task frog_jump --param jump_thresh=0.04
+    python rescore_traces.py --traces /data/traces --workers 16
+"""
+import argparse
+import inspect
+import json
+import os
+from collections import Counter
+from multiprocessing import Pool
+
+from physical_tasks import PHYSICAL_TASKS
+from utils.gesture_utils import score_trace
+from utils.trace_utils import TRACE_DIR, read_index, load_trace
+from utils.vision_utils import mirror_landmarks
+
+def _rescore(job):
+    entry, directory, params = job
+    spec = PHYSICAL_TASKS[entry["task"]]
+    timestamps, landmarks = load_trace(entry["id"], directory)
+    if entry.get("mirrored", spec.mirror) != spec.mirror:
+        landmarks = mirror_landmarks(landmarks)
+    completed = score_trace(spec, timestamps, landmarks, **params)
+    return {
+        "id": entry["id"],
+        "task": entry["task"],
+        "recorded": entry.get("result", {}).get("completed"),
+        "completed": completed,
+    }
+
+def _parse_params(parser, pairs):
+    params = {}
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not key or not sep:
+            parser.error(f"--param expects NAME=VALUE, got {pair!r}")
+        try:
+            params[key] = float(value)
+        except ValueError:
+            parser.error(f"--param {key} needs a number, got {value!r}")
+    return params
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score recorded physical-task traces.")
+    parser.add_argument("--traces", default=TRACE_DIR, help="trace directory containing index.jsonl")
+    parser.add_argument("--task", choices=sorted(PHYSICAL_TASKS), help="only re-score this task")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="override one of the task's check parameters (repeatable)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    params = _parse_params(parser, args.param)
+    if params:
+        # Check parameters differ between tasks, so overrides only make sense for one of them
+        if args.task is None:
+            parser.error("--param requires --task")
+        accepted = inspect.signature(PHYSICAL_TASKS[args.task].check).parameters
+        unknown = sorted(set(params) - set(accepted))
+        if unknown:
+            parser.error(f"{args.task} does not take {', '.join(unknown)}")
+    entries = [e for e in read_index(args.traces) if args.task is None or e["task"] == args.task]
+    jobs = [(entry, args.traces, params) for entry in entries]
+
+    changed = Counter()
+    with Pool(processes=args.workers) as pool:
+        for result in pool.imap_unordered(_rescore, jobs, chunksize=32):
+            print(json.dumps(result))
+            changed[result["completed"] == result["recorded"]] += 1
+
+    print(json.dumps({"traces": len(jobs), "unchanged": changed[True], "changed": changed[False]}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+import collections
+import logging
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+DEFAULT_WARM_UP_S = 2.0
+DEFAULT_IDLE_TIMEOUT_S = 120.0
+
+logger = logging.getLogger(__name__)
+
+class FrameSource:
+    """Common interface for everything the physical tasks can read frames from.
+
+    Sources follow the ``read``/``isOpened``/``release`` methods of
+    ``cv2.VideoCapture``. ``clock()`` returns the time of the last frame in
+    seconds: wall-clock time for live sources, media time for recorded ones,
+    so task timeouts mean the same thing whether or not a clip is replayed
+    faster than real time.
+    """
+    realtime = False
+
+    def __init__(self):
+        self.last_timestamp = None
+
+    def clock(self):
+        return self.last_timestamp if self.last_timestamp is not None else 0.0
+
+    def wait_ready(self, timeout=None):
+        """Block until the first usable frame can be read; most sources are ready at once."""
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def isOpened(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+class ThreadedCapture(FrameSource):
+    """Reads a cv2.VideoCapture on its own thread and always serves the newest frame.
+
+    Frames the consumer never saw are counted in ``frames_dropped``. The
+    device is only released once the reader thread is out of ``cap.read()``.
+    """
+    realtime = True
+
+    def __init__(self, source=0, buffer_size=2):
+        super().__init__()
+        self.cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._running = self.cap.isOpened()
+        self._closing = False
+        self._reader_done = False
+        self.frames_captured = 0
+        self.frames_served = 0
+        self.frames_dropped = 0
+        self._thread = threading.Thread(target=self._reader, daemon=True)
+        self._thread.start()
+
+    def _reader(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            with self._cond:
+                if not ret:
+                    self._running = False
+                    self._cond.notify_all()
+                    break
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.frames_dropped += 1
+                self._buffer.append((time.time(), frame))
+                self.frames_captured += 1
+                self._cond.notify_all()
+        with self._cond:
+            self._reader_done = True
+            release = self._closing
+        if release:
+            # release() gave up waiting for us; free the device now that no read is in flight
+            self.cap.release()
+
+    def clock(self):
+        return time.time()
+
+    def isOpened(self):
+        with self._cond:
+            return self._running or bool(self._buffer)
+
+    def read(self, timeout=1.0):
+        """Block until a frame newer than the last one served is available."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._buffer or not self._running, timeout=timeout)
+            if not self._buffer:
+                return False, None
+            self.frames_dropped += len(self._buffer) - 1
+            self.last_timestamp, frame = self._buffer.pop()
+            self._buffer.clear()
+            self.frames_served += 1
+            return True, frame
+
+    def stats(self):
+        with self._cond:
+            return {
+                "captured": self.frames_captured,
+                "served": self.frames_served,
+                "dropped": self.frames_dropped,
+            }
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._closing = True
+            reader_done = self._reader_done
+            self._cond.notify_all()
+        if reader_done:
+            self.cap.release()
+        else:
+            # The reader releases the device itself when its current read returns
+            self._thread.join(timeout=1.0)
+
+class CameraSession:
+    """Keeps one camera open for a whole assessment session.
+
+    The device is opened and warmed up on a background thread: frames are read
+    and discarded until the mean brightness stops changing (auto exposure has
+    settled) or ``warm_up_s`` passes. Tasks and retries borrow the running
+    capture through ``lease()`` instead of reopening it. Once no lease has been
+    active for ``idle_timeout_s`` the device is released, which also covers
+    sessions that end without saying so; the next lease reopens it. The
+    watchdog thread only runs while the device is open, so an abandoned
+    session can be garbage collected once its camera has been released.
+    """
+    def __init__(self, index=0, warm_up_s=DEFAULT_WARM_UP_S, idle_timeout_s=DEFAULT_IDLE_TIMEOUT_S,
+                 settle_delta=2.0, settle_frames=5):
+        self.index = index
+        self.warm_up_s = warm_up_s
+        self.idle_timeout_s = idle_timeout_s
+        self.settle_delta = settle_delta
+        self.settle_frames = settle_frames
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._capture = None
+        self._opening = False
+        self._closed = False
+        self._leases = 0
+        self._last_used = time.monotonic()
+        self.opens = 0
+        self.idle_releases = 0
+        self.open_s = None
+        self.time_to_first_frame_s = None
+        self.warm_up_frames = 0
+        self._watchdog = None
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        self._ready.clear()
+        self._opening = True
+        threading.Thread(target=self._open_and_warm_up, daemon=True).start()
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, daemon=True)
+            self._watchdog.start()
+
+    def _open_and_warm_up(self):
+        started = time.perf_counter()
+        capture = ThreadedCapture(self.index)
+        open_s = time.perf_counter() - started
+        deadline = time.perf_counter() + self.warm_up_s
+        frames, stable, previous = 0, 0, None
+        while capture.isOpened() and time.perf_counter() < deadline:
+            ret, frame = capture.read()
+            if not ret:
+                continue
+            frames += 1
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+            level = float(cv2.resize(gray, (32, 24), interpolation=cv2.INTER_AREA).mean())
+            settled = previous is not None and level > 1.0 and abs(level - previous) < self.settle_delta
+            stable = stable + 1 if settled else 0
+            previous = level
+            if stable >= self.settle_frames:
+                break
+        with self._lock:
+            self._opening = False
+            if self._closed:
+                capture.release()
+                return
+            self._capture = capture
+            self._last_used = time.monotonic()
+            if frames:
+                self.opens += 1
+                self.open_s = open_s
+                self.time_to_first_frame_s = time.perf_counter() - started
+                self.warm_up_frames = frames
+        self._ready.set()
+        if frames:
+            logger.info("Camera %s ready after %.2fs (open %.2fs, %d warm-up frames)",
+                        self.index, self.time_to_first_frame_s, open_s, frames)
+        else:
+            logger.warning("Camera %s delivered no frames within %.1fs", self.index, self.warm_up_s)
+
+    def lease(self):
+        """A FrameSource over the shared capture; releasing it leaves the camera open."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Camera session is closed")
+            lost = self._capture is not None and not self._capture.isOpened()
+            if lost:
+                self._capture.release()
+                self._capture = None
+            if self._capture is None and not self._opening:
+                self._open()
+            self._leases += 1
+            self._last_used = time.monotonic()
+        return CameraLease(self)
+
+    def _end_lease(self):
+        with self._lock:
+            self._leases -= 1
+            self._last_used = time.monotonic()
+
+    def _watch(self):
+        """Release the device once idle, then exit; the next ``_open`` restarts the watchdog."""
+        while True:
+            time.sleep(min(self.idle_timeout_s, 5.0))
+            with self._lock:
+                if self._closed or (self._capture is None and not self._opening):
+                    self._watchdog = None
+                    return
+                idle = self._leases == 0 and time.monotonic() - self._last_used > self.idle_timeout_s
+                if idle and self._capture is not None:
+                    self.idle_releases += 1
+                    logger.info("Releasing camera %s after %.0fs idle", self.index, self.idle_timeout_s)
+                    self._release_capture()
+                    self._watchdog = None
+                    return
+
+    def _release_capture(self):
+        self._ready.clear()
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "camera_open": self._capture is not None and self._capture.isOpened(),
+                "camera_opens": self.opens,
+                "camera_idle_releases": self.idle_releases,
+                "camera_open_s": self.open_s,
+                "time_to_first_frame_s": self.time_to_first_frame_s,
+                "warm_up_frames": self.warm_up_frames,
+            }
+
+    def release(self):
+        """Close the device now; a later ``lease()`` opens it again."""
+        with self._lock:
+            self._release_capture()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._release_capture()
+
+class CameraLease(FrameSource):
+    """One task's view of a CameraSession."""
+    realtime = True
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self._released = False
+
+    def wait_ready(self, timeout=None):
+        return self.session._ready.wait(timeout)
+
+    def clock(self):
+        return time.time()
+
+    def isOpened(self):
+        capture = self.session._capture
+        return not self._released and capture is not None and capture.isOpened()
+
+    def read(self, timeout=1.0):
+        if self._released or not self.wait_ready(timeout):
+            return False, None
+        capture = self.session._capture
+        if capture is None:
+            return False, None
+        ret, frame = capture.read(timeout)
+        if ret:
+            self.last_timestamp = capture.last_timestamp
+        return ret, frame
+
+    def stats(self):
+        return self.session.stats()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.session._end_lease()
+
+class VideoFileSource(FrameSource):
+    """Serves every frame of a recorded clip, decoding ahead on a background thread.
+
+    Nothing is dropped; the decoder blocks once ``prefetch`` frames are waiting,
+    so the clip is processed as fast as the consumer can go.
+    """
+    def __init__(self, path, prefetch=8):
+        super().__init__()
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._done = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._decoder, daemon=True)
+        self._thread.start()
+
+    def _decoder(self):
+        index = 0
+        while not self._stop.is_set():
+            ret, frame = self.cap.read()
+            item = (index / self.fps, frame) if ret else None
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if item is None:
+                break
+            index += 1
+
+    def isOpened(self):
+        return not self._done
+
+    def read(self):
+        if self._done:
+            return False, None
+        item = self._queue.get()
+        if item is None:
+            self._done = True
+            return False, None
+        self.last_timestamp, frame = item
+        return True, frame
+
+    def release(self):
+        self._stop.set()
+        self._done = True
+        self._thread.join(timeout=1.0)
+        self.cap.release()
+
+class ImageDirectorySource(FrameSource):
+    """Serves the images in a directory in filename order at a nominal frame rate."""
+    def __init__(self, path, fps=30.0):
+        super().__init__()
+        self.fps = fps
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self._index = 0
+
+    def isOpened(self):
+        return self._index < len(self.paths)
+
+    def read(self):
+        while self._index < len(self.paths):
+            frame = cv2.imread(self.paths[self._index])
+            self.last_timestamp = self._index / self.fps
+            self._index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+class SyntheticSource(FrameSource):
+    """Replays an iterable of frames, e.g. fixtures kept in memory or generated on the fly."""
+    def __init__(self, frames, fps=30.0):
+        super().__init__()
+        self.fps = fps
+        self._frames = iter(frames)
+        self._index = 0
+        self._open = True
+
+    @classmethod
+    def blank(cls, count=150, shape=(480, 640, 3), fps=30.0):
+        return cls((np.zeros(shape, dtype=np.uint8) for _ in range(count)), fps=fps)
+
+    def isOpened(self):
+        return self._open
+
+    def read(self):
+        frame = next(self._frames, None)
+        if frame is None:
+            self._open = False
+            return False, None
+        self.last_timestamp = self._index / self.fps
+        self._index += 1
+        return True, frame
+
+def open_frame_source(spec=0, **kwargs):
+    """Open a frame source from a camera index, a video/image-dir path or ``"synthetic"``."""
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return ThreadedCapture(int(spec), **kwargs)
+    if spec == "synthetic":
+        return SyntheticSource.blank(**kwargs)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, **kwargs)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, **kwargs)
+    raise ValueError(f"Unknown frame source: {spec!r}")
@@ -0,0 +1,287 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from .temporal_utils import HoldFilter, LandmarkHistory, sequence_velocity
+from .trace_utils import first_detection
+from .vision_utils import mirror_landmarks
+
+CAMERA_READY_TIMEOUT_S = 10.0
+
+@dataclass
+class GestureSpec:
+    """Declarative description of a physical task.
+
+    ``check(landmarks, **params)`` decides whether a frame shows the gesture.
+    With ``baseline`` set, the check also receives the median of
+    ``baseline(landmarks)`` over the first ``baseline_s`` seconds with a detected
+    person; with ``velocity`` it receives per-landmark velocities instead.
+    While the gesture is in progress ``exit_params`` (default: ``params``) are
+    used, giving threshold hysteresis. It must then be held for ``hold_s``
+    seconds; gaps shorter than ``release_s`` do not interrupt it. All timing is
+    taken from frame timestamps, never frame counts. Checks must accept
+    (T, 33, 4) sequences as well so recorded traces can be scored in one pass.
+    """
+    name: str
+    prompt: str
+    success_message: str
+    check: Callable[..., Any]
+    baseline: Optional[Callable[[np.ndarray], Any]] = None
+    baseline_s: float = 0.0
+    velocity: bool = False
+    velocity_window_s: float = 0.25
+    params: Dict[str, float] = field(default_factory=dict)
+    exit_params: Optional[Dict[str, float]] = None
+    hold_s: float = 0.0
+    release_s: float = 0.0
+    timeout_s: float = 15.0
+    score: int = 3
+    mirror: bool = True
+
+class GestureEngine:
+    """The shared capture/detect/evaluate loop behind every physical task."""
+    def __init__(self, spec, detector, on_frame=None, recorder=None, params=None, video=None):
+        self.spec = spec
+        self.detector = detector
+        self.on_frame = on_frame
+        self.recorder = recorder
+        self.video = video
+        self.params = {**spec.params, **(params or {})}
+        self.exit_params = {**self.params, **(spec.exit_params or {})}
+        self.hold = HoldFilter(spec.hold_s, spec.release_s)
+        self.history = LandmarkHistory(spec.velocity_window_s) if spec.velocity else None
+        self._baseline_values = []
+        self._baseline_start = None
+        self._reference = None
+        self.frames = 0
+        self.inference_s = 0.0
+
+    def evaluate(self, timestamp, landmarks):
+        """True/False for the current frame, or None when nobody is detected."""
+        spec = self.spec
+        if landmarks is None:
+            return None
+        params = self.exit_params if self.hold.active else self.params
+        if spec.velocity:
+            self.history.append(timestamp, landmarks)
+            return bool(spec.check(landmarks, self.history.velocity(), **params))
+        if spec.baseline is None:
+            return bool(spec.check(landmarks, **params))
+        if self._reference is None:
+            if self._baseline_start is None:
+                self._baseline_start = timestamp
+            if timestamp - self._baseline_start <= spec.baseline_s:
+                self._baseline_values.append(spec.baseline(landmarks))
+                return False
+            self._reference = np.median(self._baseline_values, axis=0)
+        return bool(spec.check(landmarks, self._reference, **params))
+
+    def run(self, cap, stop=None):
+        """Read frames until the gesture is held long enough, the time limit passes or ``stop`` is set."""
+        spec = self.spec
+        start = None
+        completed = False
+
+        while cap.isOpened():
+            if stop is not None and stop.is_set():
+                break
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = cap.last_timestamp
+            # Same window as score_trace: frames within timeout_s of the first one
+            if start is None:
+                start = timestamp
+            elif timestamp - start >= spec.timeout_s:
+                break
+            if self.video is not None:
+                self.video.submit(timestamp, frame)
+            infer_start = time.perf_counter()
+            landmarks = self.detector.get_landmarks(frame, timestamp)
+            self.inference_s += time.perf_counter() - infer_start
+            self.frames += 1
+            # The trace keeps camera orientation to match the video; only evaluation is mirrored
+            if self.recorder is not None:
+                self.recorder.append(timestamp, landmarks)
+            if spec.mirror:
+                landmarks = mirror_landmarks(landmarks)
+
+            if self.hold.update(timestamp, self.evaluate(timestamp, landmarks)):
+                completed = True
+                break
+
+            if self.on_frame:
+                self.on_frame(frame)
+
+        elapsed = cap.clock() - start if self.frames else 0.0
+        return {
+            "completed": completed,
+            "cancelled": not completed and stop is not None and stop.is_set(),
+            "score": spec.score if completed else 0,
+            "frames": self.frames,
+            "elapsed_s": elapsed,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "avg_inference_ms": 1000 * self.inference_s / self.frames if self.frames else 0.0,
+            **self.detector.stats(),
+        }
+
+def score_trace(spec, timestamps, landmarks, **params):
+    """Replay a GestureSpec over a recorded trace.
+
+    The checks run vectorized over the whole trace with both entry and exit
+    thresholds; only the cheap hold/hysteresis state machine steps frame by frame.
+    ``landmarks`` must be oriented as the task evaluates them, i.e. mirrored
+    when ``spec.mirror`` is set; stored traces are not (see ``TraceRecorder``).
+    """
+    if len(timestamps) == 0:
+        return False
+    enter_params = {**spec.params, **params}
+    exit_params = {**enter_params, **(spec.exit_params or {})}
+    keep = timestamps - timestamps[0] < spec.timeout_s
+    timestamps, landmarks = np.asarray(timestamps[keep]), np.asarray(landmarks[keep])
+    detected = ~np.isnan(landmarks[:, 0, 0])
+
+    if spec.velocity:
+        reference = sequence_velocity(timestamps, landmarks, spec.velocity_window_s)
+        evaluated = detected
+    elif spec.baseline is not None:
+        start = first_detection(landmarks)
+        if start is None:
+            return False
+        in_baseline = detected & (timestamps - timestamps[start] <= spec.baseline_s)
+        evaluated = detected & ~in_baseline
+        reference = np.median(spec.baseline(landmarks[in_baseline]), axis=0)
+    else:
+        evaluated = detected
+
+    def hits(check_params):
+        if spec.velocity or spec.baseline is not None:
+            result = spec.check(landmarks, reference, **check_params)
+        else:
+            result = spec.check(landmarks, **check_params)
+        return np.asarray(result) & evaluated
+
+    enter_hits, exit_hits = hits(enter_params), hits(exit_params)
+    hold = HoldFilter(spec.hold_s, spec.release_s)
+    for i, timestamp in enumerate(timestamps):
+        hit = (exit_hits if hold.active else enter_hits)[i] if detected[i] else None
+        if hold.update(timestamp, hit):
+            return True
+    return False
+
+class GestureTaskRunner:
+    """Runs one physical attempt on a background thread owned by the session.
+
+    The Streamlit script run only starts the runner and returns; the page polls
+    ``preview()``, ``remaining_s`` and ``result`` from a periodically refreshed
+    fragment. ``cancel`` returns immediately and the worker stops at its next
+    frame, releasing the camera and its scheduler session. The time limit only
+    starts once the source is ready, so camera warm-up never eats into it.
+
+    ``started_at`` and ``finished_at`` are wall-clock ``time.time()`` values;
+    ``finished_at`` is stored as the attempt's timestamp.
+    """
+    def __init__(self, spec, source=0, record_video=False):
+        from .preview_utils import JpegEncoder
+
+        self.spec = spec
+        self.source = source
+        self.record_video = record_video
+        self.result = None
+        self.error = None
+        self.ready = False
+        self.started_at = time.time()
+        self.finished_at = None
+        self._encoder = JpegEncoder(mirror=spec.mirror)
+        self._frame = None
+        self._frame_seq = 0
+        self._frame_lock = threading.Lock()
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._preview_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"gesture-{spec.name}", daemon=True)
+        self._thread.start()
+
+    def _on_frame(self, frame):
+        with self._frame_lock:
+            self._frame = frame
+            self._frame_seq += 1
+
+    def _run(self):
+        from .capture_utils import open_frame_source
+        from .scheduler_utils import get_pose_scheduler
+        from .trace_utils import TraceRecorder, VideoRecorder
+
+        video = None
+        try:
+            cap = open_frame_source(self.source)
+            try:
+                camera_wait_s = self._wait_ready(cap)
+                recorder = TraceRecorder(self.spec.name)
+                if self.record_video:
+                    # Files know their frame rate; for cameras it is measured from the frames
+                    video = VideoRecorder(recorder.trace_id, fps=getattr(cap, "fps", None))
+                with get_pose_scheduler().session() as detector:
+                    engine = GestureEngine(self.spec, detector, on_frame=self._on_frame,
+                                           recorder=recorder, video=video)
+                    result = engine.run(cap, stop=self._stop)
+            finally:
+                cap.release()
+                if video is not None:
+                    video_stats = video.close(discard=self._stop.is_set())
+            result["camera_wait_s"] = camera_wait_s
+            if video is not None:
+                result.update(video_stats)
+            if not result["cancelled"]:
+                result["trace_id"] = recorder.save(result=result)
+            self.result = result
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+
+    def _wait_ready(self, cap):
+        requested_at = time.time()
+        while not cap.wait_ready(0.1):
+            if self._stop.is_set():
+                break
+            if time.time() - requested_at > CAMERA_READY_TIMEOUT_S:
+                raise RuntimeError("The camera did not start in time")
+        if not self._stop.is_set() and not cap.isOpened():
+            raise RuntimeError("Could not open the camera")
+        self.ready = True
+        self.started_at = time.time()
+        return self.started_at - requested_at
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def remaining_s(self):
+        if not self.ready:
+            return self.spec.timeout_s
+        return max(0.0, self.spec.timeout_s - (time.time() - self.started_at))
+
+    def preview(self):
+        """JPEG bytes of the latest processed frame, or None before the first one.
+
+        Each frame is encoded once, however often the page polls.
+        """
+        with self._preview_lock:
+            with self._frame_lock:
+                frame, seq = self._frame, self._frame_seq
+            if frame is not None and seq != self._jpeg_seq:
+                self._jpeg, self._jpeg_seq = self._encoder.encode(frame), seq
+            return self._jpeg
+
+    def cancel(self):
+        self._stop.set()
+
+def start_gesture_task(spec, source=0, record_video=False):
+    """Start a GestureSpec in the background and return its GestureTaskRunner."""
+    return GestureTaskRunner(spec, source, record_video)
@@ -0,0 +1,27 @@
+import cv2
+
+from .vision_utils import reuse_buffer
+
+DEFAULT_PREVIEW_FPS = 10
+DEFAULT_PREVIEW_WIDTH = 320
+DEFAULT_JPEG_QUALITY = 70
+
+class JpegEncoder:
+    """Downsizes, optionally mirrors and JPEG-encodes frames into reused buffers."""
+    def __init__(self, width=DEFAULT_PREVIEW_WIDTH, quality=DEFAULT_JPEG_QUALITY, mirror=False):
+        self.width = width
+        self.mirror = mirror
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self._scaled = None
+        self._mirrored = None
+
+    def encode(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.width:
+            size = (self.width, int(h * self.width / w))
+            self._scaled = frame = cv2.resize(frame, size, dst=reuse_buffer(self._scaled, (size[1], size[0], 3)),
+                                              interpolation=cv2.INTER_AREA)
+        if self.mirror:
+            self._mirrored = frame = cv2.flip(frame, 1, dst=reuse_buffer(self._mirrored, frame.shape))
+        ok, buf = cv2.imencode(".jpg", frame, self.encode_params)
+        return buf.tobytes() if ok else None
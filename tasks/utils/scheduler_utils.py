@@ -0,0 +1,216 @@
+import collections
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future
+from contextlib import contextmanager
+
+import numpy as np
+
+from .vision_utils import (
+    DEFAULT_TARGET_FPS, ComplexityController, MotionGate, PoseDetector, RoiTracker, mirror_landmarks,
+)
+
+DEFAULT_WORKERS = 2
+
+class _Session:
+    def __init__(self, detector):
+        self.detector = detector
+        self.pending = None
+        self.busy = False
+        self.submitted = 0
+        self.inferred = 0
+        self.dropped = 0
+        self.latencies = collections.deque(maxlen=100)
+
+class PoseScheduler:
+    """Shares a fixed set of pose workers between all sessions on the host.
+
+    Sessions submit frames and get futures back. Each session has at most one
+    queued frame: a newer submission replaces (and cancels) the older one, and
+    sessions are served round-robin so a busy station cannot starve the others.
+
+    Each session gets its own warmed-up video-mode detector with ROI tracking
+    and a ComplexityController, fed the session's submit-to-result latency so
+    a crowded host steps every session down.
+    """
+    def __init__(self, workers=DEFAULT_WORKERS, target_fps=DEFAULT_TARGET_FPS):
+        self.target_fps = target_fps
+        self._cond = threading.Condition()
+        self._sessions = {}
+        self._ready = collections.deque()
+        self._running = True
+        # Detectors of closed sessions, kept warm for the next ones
+        self._idle = [self._new_detector() for _ in range(workers)]
+        self.max_idle = workers
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"pose-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _new_detector(self):
+        detector = PoseDetector(roi_tracker=RoiTracker(), complexity=ComplexityController(self.target_fps),
+                                self_timed=False)
+        detector.warm_up()
+        return detector
+
+    def _recycle(self, detector):
+        detector.reset_state()
+        with self._cond:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(detector)
+                return
+        detector.close()
+
+    def open_session(self, session_id=None):
+        session_id = session_id or uuid.uuid4().hex
+        with self._cond:
+            if session_id in self._sessions:
+                return session_id
+            detector = self._idle.pop() if self._idle else None
+        if detector is None:
+            # More sessions than warm detectors; build one outside the lock
+            detector = self._new_detector()
+        with self._cond:
+            self._sessions[session_id] = _Session(detector)
+        return session_id
+
+    def close_session(self, session_id):
+        with self._cond:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            if session.pending is not None:
+                session.pending[-1].cancel()
+            if session.busy:
+                # The worker hands the detector back once its inference returns
+                return
+        self._recycle(session.detector)
+
+    def submit(self, session_id, frame):
+        """Queue a frame for inference; resolves to a (33, 4) array or None."""
+        future = Future()
+        with self._cond:
+            session = self._sessions[session_id]
+            if session.pending is not None:
+                session.pending[-1].cancel()
+                session.dropped += 1
+            session.pending = (frame, time.perf_counter(), future)
+            session.submitted += 1
+            if not session.busy and session_id not in self._ready:
+                self._ready.append(session_id)
+            self._cond.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._ready or not self._running)
+                if not self._running:
+                    return
+                session_id = self._ready.popleft()
+                session = self._sessions.get(session_id)
+                if session is None or session.pending is None:
+                    continue
+                frame, submitted_at, future = session.pending
+                session.pending = None
+                session.busy = True
+            ran = future.set_running_or_notify_cancel()
+            if ran:
+                try:
+                    landmarks = session.detector.get_landmarks(frame)
+                    # Still this session's detector until busy is cleared below
+                    session.detector.record_latency(time.perf_counter() - submitted_at)
+                    future.set_result(landmarks)
+                except Exception as e:
+                    future.set_exception(e)
+            with self._cond:
+                session.busy = False
+                if ran:
+                    session.inferred += 1
+                    session.latencies.append(time.perf_counter() - submitted_at)
+                closed = self._sessions.get(session_id) is not session
+                if session.pending is not None and not closed:
+                    self._ready.append(session_id)
+                    self._cond.notify()
+            if closed:
+                self._recycle(session.detector)
+
+    @contextmanager
+    def session(self):
+        """A detector-like handle for one task run, closed on exit."""
+        session_id = self.open_session()
+        try:
+            yield ScheduledDetector(self, session_id)
+        finally:
+            self.close_session(session_id)
+
+    def stats(self):
+        with self._cond:
+            sessions = {}
+            for session_id, s in self._sessions.items():
+                latencies = np.array(s.latencies) * 1000
+                sessions[session_id] = {
+                    "submitted": s.submitted,
+                    "inferred": s.inferred,
+                    "dropped": s.dropped,
+                    "p50_latency_ms": float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+                    "p95_latency_ms": float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+                    **s.detector.stats(),
+                }
+            return {
+                "workers": len(self._threads),
+                "idle_detectors": len(self._idle),
+                "queue_depth": len(self._ready),
+                "sessions": sessions,
+            }
+
+    def shutdown(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        for detector in self._idle:
+            detector.close()
+        self._idle.clear()
+
+class ScheduledDetector:
+    """PoseDetector-compatible view of one scheduler session, usable by GestureEngine.
+
+    Motion gating runs in the caller's thread, so static frames never reach the
+    shared queue. The complexity level's stride is applied by the session's
+    detector.
+    """
+    def __init__(self, scheduler, session_id, motion_gate=None):
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.motion_gate = motion_gate or MotionGate()
+        self._last_landmarks = None
+
+    def get_landmarks(self, frame, timestamp=None, mirror=False):
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.motion_gate.should_infer(frame, timestamp):
+            try:
+                self._last_landmarks = self.scheduler.submit(self.session_id, frame).result()
+            except CancelledError:
+                pass
+        return mirror_landmarks(self._last_landmarks) if mirror else self._last_landmarks
+
+    def stats(self):
+        stats = dict(self.motion_gate.stats())
+        stats.update(self.scheduler.stats()["sessions"].get(self.session_id, {}))
+        return stats
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_pose_scheduler(workers=DEFAULT_WORKERS, target_fps=DEFAULT_TARGET_FPS):
+    """Return the process-wide pose scheduler, starting its workers on first call."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PoseScheduler(workers, target_fps)
+        return _scheduler
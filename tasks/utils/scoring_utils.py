@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .capture_utils import VideoFileSource
+from .gesture_utils import GestureEngine
+from .trace_utils import TraceRecorder
+from .vision_utils import NOSE, X, Y, VISIBILITY, MotionGate, PoseDetector, RoiTracker
+
+_worker_detector = None
+
+def _init_worker():
+    global _worker_detector
+    _worker_detector = PoseDetector(motion_gate=MotionGate(), roi_tracker=RoiTracker())
+    _worker_detector.warm_up()
+
+def summarize_landmarks(timestamps, landmarks):
+    """Compact description of a landmark stream for reports and review."""
+    detected = ~np.isnan(landmarks[:, 0, 0])
+    if not detected.any():
+        return {"frames": len(timestamps), "detected_ratio": 0.0}
+    seen = landmarks[detected]
+    return {
+        "frames": len(timestamps),
+        "duration_s": float(timestamps[-1] - timestamps[0]),
+        "detected_ratio": float(detected.mean()),
+        "mean_visibility": float(seen[..., VISIBILITY].mean()),
+        "nose_x_range": float(np.ptp(seen[:, NOSE, X])),
+        "nose_y_range": float(np.ptp(seen[:, NOSE, Y])),
+    }
+
+def score_clip(spec, path, delete=False):
+    """Score one recorded clip with this process's detector, streaming frames from disk."""
+    if _worker_detector is None:
+        _init_worker()
+    _worker_detector.reset_state()
+    recorder = TraceRecorder(spec.name)
+    try:
+        # Opening can fail on a bad upload; the temporary file still goes
+        cap = VideoFileSource(path)
+        try:
+            result = GestureEngine(spec, _worker_detector, recorder=recorder).run(cap)
+        finally:
+            cap.release()
+    finally:
+        if delete:
+            os.remove(path)
+    return {
+        "task": spec.name,
+        **result,
+        "landmarks": summarize_landmarks(recorder.timestamps, recorder.landmarks),
+    }
+
+class ClipScoringService:
+    """Scores uploaded physical-task clips asynchronously on a pool of worker processes.
+
+    Each worker owns one warmed-up PoseDetector, so throughput grows with the
+    number of cores. ``submit`` returns a ``concurrent.futures.Future``.
+    """
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def submit(self, spec, path):
+        return self._executor.submit(score_clip, spec, path)
+
+    def submit_upload(self, spec, uploaded_file):
+        """Copy an uploaded clip to a temporary file the worker deletes when done."""
+        suffix = os.path.splitext(getattr(uploaded_file, "name", ""))[1] or ".mp4"
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(uploaded_file.read())
+        return self._executor.submit(score_clip, spec, f.name, True)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_scoring_service(workers=None):
+    """Return the process-wide clip scoring service, starting it on first call."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ClipScoringService(workers)
+        return _service
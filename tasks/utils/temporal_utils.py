@@ -0,0 +1,74 @@
+import collections
+
+import numpy as np
+
+class HoldFilter:
+    """Time-based debouncing of a per-frame gesture condition.
+
+    ``update`` takes True, False or None (no person detected, so unknown). The
+    gesture is confirmed once it has been active for ``hold_s`` seconds.
+    Inactive or unknown frames only end the gesture after ``release_s`` seconds
+    without an active frame, so a dropped or skipped frame never resets a hold.
+    ``active`` lets callers switch to looser exit thresholds while a gesture is
+    in progress.
+    """
+    def __init__(self, hold_s=0.0, release_s=0.0):
+        self.hold_s = hold_s
+        self.release_s = release_s
+        self.active_since = None
+        self.last_active = None
+
+    @property
+    def active(self):
+        return self.active_since is not None
+
+    def update(self, timestamp, hit):
+        if hit:
+            if self.active_since is None:
+                self.active_since = timestamp
+            self.last_active = timestamp
+        elif self.active_since is not None and timestamp - self.last_active > self.release_s:
+            self.active_since = None
+            self.last_active = None
+        return self.active and self.last_active - self.active_since >= self.hold_s
+
+class LandmarkHistory:
+    """The detected landmarks of the last ``window_s`` seconds, for velocity estimates."""
+    def __init__(self, window_s=0.25):
+        self.window_s = window_s
+        self._frames = collections.deque()
+
+    def append(self, timestamp, landmarks):
+        self._frames.append((timestamp, landmarks))
+        while len(self._frames) > 2 and timestamp - self._frames[1][0] >= self.window_s:
+            self._frames.popleft()
+
+    def velocity(self):
+        """Per-landmark (vx, vy) in normalised units per second, or None without enough history."""
+        if len(self._frames) < 2:
+            return None
+        (t0, old), (t1, new) = self._frames[0], self._frames[-1]
+        if t1 <= t0:
+            return None
+        return (new[:, :2] - old[:, :2]) / (t1 - t0)
+
+def sequence_velocity(timestamps, landmarks, window_s=0.25):
+    """Vectorized LandmarkHistory.velocity for every frame of a (T, 33, 4) sequence.
+
+    Rows without a detection are skipped, exactly as the live history never
+    stores them; their velocity and the first frame's are NaN.
+    """
+    velocity = np.full(landmarks.shape[:-1] + (2,), np.nan, dtype=np.float32)
+    valid = np.flatnonzero(~np.isnan(landmarks[:, 0, 0]))
+    if len(valid) < 2:
+        return velocity
+    t = timestamps[valid]
+    # Compare against the newest frame at least window_s old, which is what the live deque keeps
+    old = np.maximum(np.searchsorted(t, t - window_s, side="right") - 1, 0)
+    dt = t - t[old]
+    moved = dt > 0
+    rows = valid[moved]
+    velocity[rows] = (
+        (landmarks[rows, :, :2] - landmarks[valid[old[moved]], :, :2]) / dt[moved, None, None]
+    )
+    return velocity
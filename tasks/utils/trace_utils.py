@@ -0,0 +1,167 @@
+import json
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from .vision_utils import NUM_LANDMARKS
+
+TRACE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "traces"))
+INDEX_FILE = "index.jsonl"
+DEFAULT_VIDEO_FPS = 15.0
+DEFAULT_VIDEO_QUEUE = 32
+# Frames whose timestamps set the frame rate of a recording without a known one
+VIDEO_FPS_PROBE_FRAMES = 15
+
+_index_lock = threading.Lock()
+
+class TraceRecorder:
+    """Collects the timestamped landmark stream of one physical attempt.
+
+    Frames without a detected person are stored as NaN rows so the timeline
+    stays complete. Landmarks are kept as the camera saw them, not mirrored,
+    so they overlay the attempt video; the index entry says so with
+    ``"mirrored": false``. Entries without that field hold landmarks mirrored
+    the way their task's ``GestureSpec.mirror`` asked.
+    """
+    def __init__(self, task_name, capacity=512):
+        self.task_name = task_name
+        self.trace_id = f"{task_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._landmarks = np.empty((capacity, NUM_LANDMARKS, 4), dtype=np.float32)
+        self.count = 0
+
+    def append(self, timestamp, landmarks):
+        if self.count == len(self._timestamps):
+            self._timestamps = np.resize(self._timestamps, 2 * self.count)
+            self._landmarks = np.resize(self._landmarks, (2 * self.count, NUM_LANDMARKS, 4))
+        self._timestamps[self.count] = timestamp
+        self._landmarks[self.count] = np.nan if landmarks is None else landmarks
+        self.count += 1
+
+    @property
+    def timestamps(self):
+        return self._timestamps[:self.count]
+
+    @property
+    def landmarks(self):
+        return self._landmarks[:self.count]
+
+    def save(self, result=None, directory=TRACE_DIR):
+        """Write the trace as two .npy files and register it in the index."""
+        os.makedirs(directory, exist_ok=True)
+        trace_id = self.trace_id
+        np.save(os.path.join(directory, f"{trace_id}.timestamps.npy"), self.timestamps)
+        np.save(os.path.join(directory, f"{trace_id}.landmarks.npy"), self.landmarks)
+        entry = {
+            "id": trace_id,
+            "task": self.task_name,
+            "created": datetime.now().isoformat(),
+            "frames": self.count,
+            "mirrored": False,
+            "result": result or {},
+        }
+        with _index_lock, open(os.path.join(directory, INDEX_FILE), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return trace_id
+
+class VideoRecorder:
+    """Encodes the frames of an attempt to a compressed video on a background thread.
+
+    ``submit`` never blocks the task loop: frames go through a bounded queue and
+    are dropped (and counted) when the encoder falls behind. The timestamp of
+    every written frame is saved next to the video, so it lines up with the
+    landmark trace of the same id. Both are in camera orientation, un-mirrored. Frames are queued without copying, so
+    sources must not reuse their frame buffers.
+
+    Without an ``fps`` (cameras rarely report a trustworthy one) the file's
+    frame rate is measured from the timestamps of the first frames, so the
+    video plays back at the speed the attempt ran.
+    """
+    def __init__(self, trace_id, directory=TRACE_DIR, fps=None,
+                 queue_size=DEFAULT_VIDEO_QUEUE, fourcc="mp4v"):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{trace_id}.mp4")
+        self.timestamps_path = os.path.join(directory, f"{trace_id}.video_timestamps.npy")
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._timestamps = []
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self._thread = threading.Thread(target=self._encode, daemon=True)
+        self._thread.start()
+
+    def submit(self, timestamp, frame):
+        try:
+            self._queue.put_nowait((timestamp, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def _measure_fps(self, timestamps):
+        span = timestamps[-1] - timestamps[0] if len(timestamps) > 1 else 0.0
+        return (len(timestamps) - 1) / span if span > 0 else DEFAULT_VIDEO_FPS
+
+    def _encode(self):
+        writer = None
+        probe = []
+        while True:
+            item = self._queue.get()
+            if item is not None and writer is None and self.fps is None and len(probe) < VIDEO_FPS_PROBE_FRAMES:
+                probe.append(item)
+                continue
+            if writer is None and (probe or item is not None):
+                if self.fps is None:
+                    self.fps = self._measure_fps([timestamp for timestamp, _ in probe])
+                height, width = (probe[0] if probe else item)[1].shape[:2]
+                writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, (width, height))
+            for timestamp, frame in probe + ([item] if item is not None else []):
+                writer.write(frame)
+                self._timestamps.append(timestamp)
+                self.frames_written += 1
+            probe = []
+            if item is None:
+                break
+        if writer is not None:
+            writer.release()
+
+    def stats(self):
+        return {
+            "video_frames": self.frames_written,
+            "video_dropped": self.frames_dropped,
+            "video_fps": self.fps,
+        }
+
+    def close(self, discard=False):
+        """Finish encoding the queued frames; ``discard`` deletes the files instead of keeping them."""
+        self._queue.put(None)
+        self._thread.join()
+        if discard or not self.frames_written:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return self.stats()
+        np.save(self.timestamps_path, np.asarray(self._timestamps, dtype=np.float64))
+        return {"video": os.path.basename(self.path), **self.stats()}
+
+def read_index(directory=TRACE_DIR):
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_trace(trace_id, directory=TRACE_DIR, mmap=True):
+    """Return (timestamps, landmarks) for a stored trace, memory-mapped by default."""
+    mode = "r" if mmap else None
+    timestamps = np.load(os.path.join(directory, f"{trace_id}.timestamps.npy"), mmap_mode=mode)
+    landmarks = np.load(os.path.join(directory, f"{trace_id}.landmarks.npy"), mmap_mode=mode)
+    return timestamps, landmarks
+
+def first_detection(landmarks):
+    """Index of the first frame with a detected person, or None."""
+    found = ~np.isnan(landmarks[:, 0, 0])
+    return int(found.argmax()) if found.any() else None
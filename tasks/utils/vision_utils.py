@@ -1,52 +1,525 @@
+import collections
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import mediapipe as mp
+import numpy as np
 import cv2
 
 mp_pose = mp.solutions.pose
 POSE_LMS = mp_pose.PoseLandmark
 
+# Landmarks are handled as float32 arrays of shape (33, 4), or (T, 33, 4) for a
+# sequence of frames, with columns x, y, z, visibility.
+NUM_LANDMARKS = len(POSE_LMS)
+X, Y, Z, VISIBILITY = range(4)
+NOSE = POSE_LMS.NOSE.value
+LEFT_SHOULDER = POSE_LMS.LEFT_SHOULDER.value
+RIGHT_SHOULDER = POSE_LMS.RIGHT_SHOULDER.value
+LEFT_WRIST = POSE_LMS.LEFT_WRIST.value
+RIGHT_WRIST = POSE_LMS.RIGHT_WRIST.value
+LEFT_HIP = POSE_LMS.LEFT_HIP.value
+RIGHT_HIP = POSE_LMS.RIGHT_HIP.value
+LEFT_KNEE = POSE_LMS.LEFT_KNEE.value
+RIGHT_KNEE = POSE_LMS.RIGHT_KNEE.value
+
+# Index of each landmark's left/right counterpart, used to mirror landmarks
+# instead of flipping camera frames.
+MIRROR_INDEX = np.array([
+    POSE_LMS[lm.name.replace("LEFT", "#").replace("RIGHT", "LEFT").replace("#", "RIGHT")].value
+    for lm in POSE_LMS
+])
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_TARGET_FPS = 15
+
+POSE_MODEL_DIR = os.path.join(os.path.dirname(mp.__file__), "modules", "pose_landmark")
+
+def pose_model_installed(model_complexity):
+    """Whether the landmark model for a complexity ships with, or was already fetched into, mediapipe."""
+    name = ("lite", "full", "heavy")[model_complexity]
+    return os.path.exists(os.path.join(POSE_MODEL_DIR, f"pose_landmark_{name}.tflite"))
+
+# Pose model settings from cheapest to most accurate. ``stride`` is not a
+# MediaPipe option: the detector infers on every stride-th frame and repeats
+# the last landmarks in between. The pip wheel only bundles the full model
+# (complexity 1); lite (0) and heavy (2) are downloaded on first use, which
+# fails offline. The cheaper levels therefore thin out inference on the full
+# model, with smoothing off so the sparser landmarks do not lag, and lite is
+# only added once it is installed.
+COMPLEXITY_LEVELS = (
+    {"model_complexity": 1, "smooth_landmarks": False, "stride": 3},
+    {"model_complexity": 1, "smooth_landmarks": False, "stride": 2},
+    *([{"model_complexity": 0, "smooth_landmarks": True}] if pose_model_installed(0) else []),
+    {"model_complexity": 1, "smooth_landmarks": True},
+)
+
+logger = logging.getLogger(__name__)
+
+def reuse_buffer(buffer, shape, dtype=np.uint8):
+    """Return ``buffer`` if it already has the wanted shape, otherwise a new array."""
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        return np.empty(shape, dtype=dtype)
+    return buffer
+
+class MotionGate:
+    """Decides whether a frame differs enough from the last inferred one to re-run pose inference.
+
+    Frames are compared as small grayscale thumbnails. A refresh is forced at
+    least every ``min_refresh_s`` seconds so slow drift is never missed.
+    """
+    def __init__(self, threshold=2.0, min_refresh_s=0.5, size=(64, 48)):
+        self.threshold = threshold
+        self.min_refresh_s = min_refresh_s
+        self.size = size
+        self.reset()
+
+    def should_infer(self, frame, timestamp):
+        w, h = self.size
+        self._thumb = cv2.resize(frame, self.size, dst=reuse_buffer(self._thumb, (h, w, 3)),
+                                 interpolation=cv2.INTER_AREA)
+        self._gray = cv2.cvtColor(self._thumb, cv2.COLOR_BGR2GRAY, dst=reuse_buffer(self._gray, (h, w)))
+        self.frames += 1
+        if self._reference is not None and timestamp - self._reference_time < self.min_refresh_s:
+            self._diff = cv2.absdiff(self._gray, self._reference, dst=reuse_buffer(self._diff, (h, w)))
+            if cv2.mean(self._diff)[0] < self.threshold:
+                self.skipped += 1
+                return False
+        self._gray, self._reference = self._reference, self._gray
+        self._reference_time = timestamp
+        return True
+
+    def reset(self):
+        self._thumb = self._gray = self._diff = None
+        self._reference = None
+        self._reference_time = None
+        self.frames = 0
+        self.skipped = 0
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+        }
+
+class RoiTracker:
+    """Crops inference input to the area around the previous pose.
+
+    The box around the last visible landmarks, plus a margin, is widened to
+    the frame's aspect ratio, cut out and resized to the frame scaled down to
+    at most ``max_side`` pixels. Every crop therefore has the same shape, so
+    the resize and colour conversion buffers are reused on every frame.
+    Landmarks found in the crop are mapped back to full-frame coordinates.
+    Without a previous pose the whole frame is searched.
+
+    The box stays put while the person is well inside it and only moves when
+    they come within ``edge`` of its border or shrink to less than half of it.
+    A video-mode graph then sees a steady crop instead of one that shifts
+    every frame, which would defeat its tracking and landmark smoothing.
+    """
+    def __init__(self, margin=0.25, max_side=320, min_visibility=0.5, min_points=8, edge=0.1):
+        self.margin = margin
+        self.edge = edge
+        self.max_side = max_side
+        self.min_visibility = min_visibility
+        self.min_points = min_points
+        self.reset()
+
+    @property
+    def tracking(self):
+        return self._box is not None
+
+    def crop(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_side / max(h, w))
+        size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        if self._box is None:
+            x0, y0, cw, ch = 0, 0, w, h
+            self.full_searches += 1
+        else:
+            bx0, by0, bx1, by1 = self._box
+            # Same fraction of both sides keeps the frame's aspect ratio; never
+            # smaller than the output so crops are only ever scaled down
+            side = min(1.0, max(bx1 - bx0, by1 - by0, scale))
+            cw, ch = max(1, round(side * w)), max(1, round(side * h))
+            x0 = min(max(0, round((bx0 + bx1) / 2 * w - cw / 2)), w - cw)
+            y0 = min(max(0, round((by0 + by1) / 2 * h - ch / 2)), h - ch)
+            self.tracked_frames += 1
+        self._crop = (x0, y0, cw, ch, w, h)
+        roi = frame[y0:y0 + ch, x0:x0 + cw]
+        if (cw, ch) != size:
+            self._scaled = roi = cv2.resize(roi, size, dst=reuse_buffer(self._scaled, (size[1], size[0], 3)),
+                                            interpolation=cv2.INTER_AREA)
+        self.input_pixels += size[0] * size[1]
+        return roi
+
+    def to_full_frame(self, landmarks):
+        """Map crop-relative landmarks back to the full frame and update the tracked box."""
+        if landmarks is None:
+            self._box = None
+            return None
+        x0, y0, cw, ch, w, h = self._crop
+        landmarks[:, X] = (landmarks[:, X] * cw + x0) / w
+        landmarks[:, Y] = (landmarks[:, Y] * ch + y0) / h
+        landmarks[:, Z] *= cw / w
+        self._update_box(landmarks)
+        return landmarks
+
+    def _update_box(self, landmarks):
+        visible = landmarks[landmarks[:, VISIBILITY] > self.min_visibility, :2]
+        if len(visible) < self.min_points:
+            self._box = None
+            return
+        lo, hi = visible.min(axis=0), visible.max(axis=0)
+        if self._box is not None:
+            box_lo, box_hi = np.array(self._box[:2]), np.array(self._box[2:])
+            inset = (box_hi - box_lo) * self.edge
+            # Edges clipped to the frame border cannot be left, so they need no inset
+            inset_lo = np.where(box_lo > 0.0, inset, 0.0)
+            inset_hi = np.where(box_hi < 1.0, inset, 0.0)
+            inside = (lo >= box_lo + inset_lo).all() and (hi <= box_hi - inset_hi).all()
+            if inside and ((hi - lo) * 2 * (1 + 2 * self.margin) >= box_hi - box_lo).any():
+                return
+        pad = (hi - lo) * self.margin
+        lo, hi = np.clip(lo - pad, 0.0, 1.0), np.clip(hi + pad, 0.0, 1.0)
+        self._box = (lo[0], lo[1], hi[0], hi[1]) if (hi > lo).all() else None
+        self.box_moves += 1
+
+    def reset(self):
+        self._box = None
+        self._crop = None
+        self._scaled = None
+        self.tracked_frames = 0
+        self.full_searches = 0
+        self.box_moves = 0
+        self.input_pixels = 0
+
+    def stats(self):
+        frames = self.tracked_frames + self.full_searches
+        return {
+            "tracked_frames": self.tracked_frames,
+            "full_searches": self.full_searches,
+            "box_moves": self.box_moves,
+            "avg_input_pixels": self.input_pixels / frames if frames else 0.0,
+        }
+
+class ComplexityController:
+    """Picks the pose model level whose rolling inference latency fits a target FPS.
+
+    Steps down a level when the average latency over ``window`` inferences
+    exceeds the frame budget, and back up when it drops below half of it.
+    After a switch, at least ``cooldown`` inferences pass before the next one.
+    """
+    def __init__(self, target_fps=DEFAULT_TARGET_FPS, levels=COMPLEXITY_LEVELS, start_level=None,
+                 window=30, cooldown=60):
+        self.budget = 1.0 / target_fps
+        self.levels = levels
+        self.level = len(levels) - 1 if start_level is None else start_level
+        self.cooldown = cooldown
+        self._latencies = collections.deque(maxlen=window)
+        self._since_switch = 0
+        self.switches = 0
+        self.previous_level = self.level
+        self.unavailable = set()
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def record(self, latency):
+        """Add one inference latency; return True when the level changed."""
+        self._latencies.append(latency)
+        self._since_switch += 1
+        if self._since_switch < self.cooldown or len(self._latencies) < self._latencies.maxlen:
+            return False
+        avg = sum(self._latencies) / len(self._latencies)
+        if avg > self.budget:
+            new_level = self.level - 1
+        elif avg < self.budget / 2:
+            new_level = self.level + 1
+        else:
+            return False
+        if not 0 <= new_level < len(self.levels) or new_level in self.unavailable:
+            return False
+        logger.info(
+            "Pose model level %d -> %d (avg latency %.1f ms, budget %.1f ms): %s",
+            self.level, new_level, avg * 1000, self.budget * 1000, self.levels[new_level],
+        )
+        self.previous_level = self.level
+        self.level = new_level
+        self.switches += 1
+        self._latencies.clear()
+        self._since_switch = 0
+        return True
+
+    def mark_unavailable(self, level):
+        """Stop using a level whose model failed to load, returning to the previous one."""
+        self.unavailable.add(level)
+        if self.level == level:
+            self.level = self.previous_level
+            self.switches -= 1
+
+    def stats(self):
+        return {
+            "model_level": self.level,
+            "model_switches": self.switches,
+            "avg_latency_ms": 1000 * sum(self._latencies) / len(self._latencies) if self._latencies else 0.0,
+        }
+
 class PoseDetector:
-    """Wrapper around MediaPipe Pose to extract landmarks."""
-    def __init__(self, static_image_mode=False):
-        self.pose = mp_pose.Pose(static_image_mode=static_image_mode)
+    """Wrapper around MediaPipe Pose to extract landmarks.
+
+    The complexity controller is fed each inference's own latency, unless
+    ``self_timed`` is False; the owner then reports latencies through
+    ``record_latency``, e.g. including time spent queued.
+    """
+    def __init__(self, static_image_mode=False, motion_gate=None, roi_tracker=None, complexity=None,
+                 self_timed=True):
+        self.static_image_mode = static_image_mode
+        self.self_timed = self_timed
+        self.motion_gate = motion_gate
+        self.roi_tracker = roi_tracker
+        self.complexity = complexity
+        self._poses = {}
+        settings = self.complexity.settings if complexity is not None else {}
+        self.pose = self._load_pose(settings)
+        self.stride = settings.get("stride", 1)
+        self._strided = 0
+        self._last_landmarks = None
+        self._rgb = None
+
+    def _load_pose(self, settings):
+        """Return the MediaPipe graph for the given settings, building it once."""
+        settings = {k: v for k, v in settings.items() if k != "stride"}
+        key = tuple(sorted(settings.items()))
+        if key not in self._poses:
+            self._poses[key] = mp_pose.Pose(static_image_mode=self.static_image_mode, **settings)
+        return self._poses[key]
+
+    def _switch_level(self):
+        try:
+            self.pose = self._load_pose(self.complexity.settings)
+            self.stride = self.complexity.settings.get("stride", 1)
+        except Exception as e:
+            logger.warning("Could not load pose model level %d: %s", self.complexity.level, e)
+            self.complexity.mark_unavailable(self.complexity.level)
+
+    def get_landmarks(self, frame, timestamp=None, mirror=False):
+        """Return a (33, 4) float32 landmark array, or None when nobody is found.
+
+        With a motion gate, static frames reuse the previous result instead of
+        running inference, and so do frames skipped by the complexity level's
+        stride. ``mirror`` gives the landmarks of the horizontally flipped
+        frame without flipping any pixels.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.motion_gate is None or self.motion_gate.should_infer(frame, timestamp):
+            if self.take_stride():
+                self._last_landmarks = self.infer(frame)
+        return mirror_landmarks(self._last_landmarks) if mirror else self._last_landmarks
+
+    def take_stride(self):
+        """Count one frame against the stride; True when it is due for inference."""
+        self._strided = (self._strided + 1) % self.stride if self.stride > 1 else 0
+        return self._strided == 0 or self._last_landmarks is None
 
-    def get_landmarks(self, frame):
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def infer(self, frame, roi_tracker=None):
+        """Run pose inference now, optionally cropping with another caller's ROI tracker."""
+        tracker = roi_tracker or self.roi_tracker
+        if tracker is None:
+            return self._process(frame)
+        # A miss drops the tracked box, so the next frame searches the whole frame
+        return tracker.to_full_frame(self._process(tracker.crop(frame)))
+
+    def _process(self, image):
+        self._rgb = rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=reuse_buffer(self._rgb, image.shape))
+        start = time.perf_counter()
         results = self.pose.process(rgb)
-        return results.pose_landmarks
+        if self.self_timed:
+            # Per-frame cost: inference only runs on one frame in ``stride``
+            self.record_latency((time.perf_counter() - start) / self.stride)
+        return landmarks_to_array(results.pose_landmarks)
+
+    def record_latency(self, latency):
+        """Report one frame's latency to the complexity controller, switching level if it asks."""
+        if self.complexity is not None and self.complexity.record(latency):
+            self._switch_level()
+
+    def warm_up(self, shape=(480, 640, 3)):
+        """Run one inference on a blank frame so the graph is loaded before first use.
+
+        With a complexity controller every level is built up front, so a switch
+        never stalls a running task.
+        """
+        blank = np.zeros(shape, dtype=np.uint8)
+        if self.complexity is not None:
+            for level, settings in enumerate(self.complexity.levels):
+                try:
+                    self._load_pose(settings).process(blank)
+                except Exception as e:
+                    logger.warning("Could not load pose model level %d: %s", level, e)
+                    self.complexity.unavailable.add(level)
+        self._process(blank)
+
+    def reset_state(self):
+        """Forget per-session state before the detector is handed to someone else."""
+        self._last_landmarks = None
+        self._strided = 0
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        if self.roi_tracker is not None:
+            self.roi_tracker.reset()
+
+    def stats(self):
+        stats = {}
+        if self.motion_gate is not None:
+            stats.update(self.motion_gate.stats())
+        if self.roi_tracker is not None:
+            stats.update(self.roi_tracker.stats())
+        if self.complexity is not None:
+            stats.update(self.complexity.stats())
+        return stats
+
+    def close(self):
+        for pose in self._poses.values():
+            pose.close()
+
+def landmarks_to_array(pose_landmarks):
+    if pose_landmarks is None:
+        return None
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose_landmarks.landmark],
+        dtype=np.float32,
+    )
+
+def mirror_landmarks(landmarks):
+    """Landmarks as they would be detected in the horizontally flipped frame."""
+    if landmarks is None:
+        return None
+    mirrored = landmarks[..., MIRROR_INDEX, :]
+    mirrored[..., X] = 1.0 - mirrored[..., X]
+    return mirrored
+
+class PoseDetectorPool:
+    """Thread-safe pool of warmed-up PoseDetectors shared by all sessions."""
+    def __init__(self, size=DEFAULT_POOL_SIZE, warm_up=True, motion_gating=True, roi_tracking=True,
+                 target_fps=DEFAULT_TARGET_FPS):
+        self.size = size
+        self._cond = threading.Condition()
+        self._idle = []
+        for _ in range(size):
+            detector = PoseDetector(
+                motion_gate=MotionGate() if motion_gating else None,
+                roi_tracker=RoiTracker() if roi_tracking else None,
+                complexity=ComplexityController(target_fps) if target_fps else None,
+            )
+            if warm_up:
+                detector.warm_up()
+            self._idle.append(detector)
+        self._checkouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self, timeout=None):
+        start = time.perf_counter()
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._idle, timeout=timeout):
+                raise TimeoutError(f"No PoseDetector available after {timeout}s")
+            detector = self._idle.pop()
+            waited = time.perf_counter() - start
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return detector
+
+    def release(self, detector):
+        detector.reset_state()
+        with self._cond:
+            self._idle.append(detector)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        detector = self.acquire(timeout=timeout)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+
+    def stats(self):
+        with self._cond:
+            in_use = self.size - len(self._idle)
+            return {
+                "size": self.size,
+                "in_use": in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "avg_wait_s": self._total_wait / self._checkouts if self._checkouts else 0.0,
+                "max_wait_s": self._max_wait,
+            }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pose_pool(size=DEFAULT_POOL_SIZE, target_fps=DEFAULT_TARGET_FPS):
+    """Return the process-wide detector pool, creating and warming it on first call.
+
+    ``target_fps=None`` leaves out the complexity controller, so results do
+    not depend on how fast the host is.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PoseDetectorPool(size=size, target_fps=target_fps)
+        return _pool
 
 def wrists_above_head(landmarks):
-    if not landmarks: return False
-    nose_y = landmarks.landmark[POSE_LMS.NOSE].y
-    lw_y = landmarks.landmark[POSE_LMS.LEFT_WRIST].y
-    rw_y = landmarks.landmark[POSE_LMS.RIGHT_WRIST].y
-    return lw_y < nose_y and rw_y < nose_y
+    if landmarks is None: return False
+    y = landmarks[..., Y]
+    return (y[..., LEFT_WRIST] < y[..., NOSE]) & (y[..., RIGHT_WRIST] < y[..., NOSE])
 
 def one_leg_up(landmarks):
-    if not landmarks: return False
-    l_knee_y = landmarks.landmark[POSE_LMS.LEFT_KNEE].y
-    r_knee_y = landmarks.landmark[POSE_LMS.RIGHT_KNEE].y
-    l_hip_y  = landmarks.landmark[POSE_LMS.LEFT_HIP].y
-    r_hip_y  = landmarks.landmark[POSE_LMS.RIGHT_HIP].y
-    return (l_knee_y < l_hip_y and r_knee_y > r_hip_y) or (r_knee_y < r_hip_y and l_knee_y > l_hip_y)
+    if landmarks is None: return False
+    y = landmarks[..., Y]
+    l_knee_y, r_knee_y = y[..., LEFT_KNEE], y[..., RIGHT_KNEE]
+    l_hip_y, r_hip_y = y[..., LEFT_HIP], y[..., RIGHT_HIP]
+    return ((l_knee_y < l_hip_y) & (r_knee_y > r_hip_y)) | ((r_knee_y < r_hip_y) & (l_knee_y > l_hip_y))
+
+def nose_x(landmarks):
+    return landmarks[..., NOSE, X]
+
+def nose_y(landmarks):
+    return landmarks[..., NOSE, Y]
+
+def torso_angle(landmarks):
+    return landmarks[..., RIGHT_SHOULDER, X] - landmarks[..., LEFT_SHOULDER, X]
 
 def torso_rotation(landmarks, initial_angle, threshold=140):
-    if not landmarks: return False
-    l_sh = landmarks.landmark[POSE_LMS.LEFT_SHOULDER]
-    r_sh = landmarks.landmark[POSE_LMS.RIGHT_SHOULDER]
-    current_angle = r_sh.x - l_sh.x
-    return abs(current_angle - initial_angle) > threshold / 180.0
+    if landmarks is None: return False
+    return np.abs(torso_angle(landmarks) - initial_angle) > threshold / 180.0
 
 def minimal_movement(prev_landmarks, curr_landmarks, thresh=0.02):
-    if not prev_landmarks or not curr_landmarks: return False
-    deltas = [abs(pl.x - cl.x) + abs(pl.y - cl.y) for pl, cl in zip(prev_landmarks.landmark, curr_landmarks.landmark)]
-    return max(deltas) < thresh
+    """Pass ``seq[:-1], seq[1:]`` to check every consecutive pair of a sequence."""
+    if prev_landmarks is None or curr_landmarks is None: return False
+    deltas = np.abs(prev_landmarks[..., :2] - curr_landmarks[..., :2]).sum(axis=-1)
+    return deltas.max(axis=-1) < thresh
+
+def holding_still(landmarks, velocity, max_speed=0.2, min_visibility=0.5):
+    """True when no visible landmark moves faster than ``max_speed`` (|vx| + |vy| per second)."""
+    if landmarks is None or velocity is None: return False
+    visible = landmarks[..., VISIBILITY] > min_visibility
+    speed = np.where(visible, np.abs(velocity).sum(axis=-1), 0.0)
+    return visible.any(axis=-1) & (speed.max(axis=-1) < max_speed)
 
 def vertical_jump(landmarks, prev_torso_y, jump_thresh=0.05):
-    if not landmarks or prev_torso_y is None: return False
-    torso_y = landmarks.landmark[POSE_LMS.NOSE].y
-    return prev_torso_y - torso_y > jump_thresh
+    if landmarks is None or prev_torso_y is None: return False
+    return prev_torso_y - landmarks[..., NOSE, Y] > jump_thresh
 
 def forward_jump(landmarks, initial_nose_x, jump_thresh=0.07):
-    if not landmarks: return False
-    nose_x = landmarks.landmark[POSE_LMS.NOSE].x
-    return abs(nose_x - initial_nose_x) > jump_thresh
+    if landmarks is None: return False
+    return np.abs(landmarks[..., NOSE, X] - initial_nose_x) > jump_thresh
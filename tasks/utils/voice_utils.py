@@ -1,9 +1,33 @@
 import os
 import json
+import collections
+import hashlib
+import logging
+import threading
+import time
 import wave
+import numpy as np
 import vosk
 
 SAMPLE_RATE = 16000  # Should match your uploaded audio file sample rate
+SAMPLE_WIDTH = 2
+CHUNK_MS = 250
+UNKNOWN_WORD = "[unk]"
+DEFAULT_MODEL_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "models", "vosk-model-small-en-us-0.15")
+)
+# Budget for resident models, in MB; unset means keep every model that was loaded
+MODEL_BUDGET_MB = float(os.environ.get("VOSK_MODEL_BUDGET_MB", 0)) or None
+# Optional on-disk transcript cache shared by server processes and restarts
+TRANSCRIPT_CACHE_DIR = os.environ.get("TRANSCRIPT_CACHE_DIR") or None
+TRANSCRIPT_CACHE_MAX_MB = float(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", 64))
+VAD_FRAME_MS = 30
+WAV_BLOCK_FRAMES = 8192
+MAX_LISTEN_S = 10.0
+END_OF_SPEECH_S = 1.0
+MIN_SPEECH_S = 0.2
+
+logger = logging.getLogger(__name__)
 
 def _get_model(model_path):
     if not os.path.isdir(model_path):
@@ -14,26 +38,685 @@ def _get_model(model_path):
         )
     return vosk.Model(model_path)
 
+def _model_size_mb(model_path):
+    """On-disk size of a model directory, a close proxy for its resident memory."""
+    total = 0
+    for root, _, files in os.walk(model_path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / (1024 * 1024)
+
+class ModelRegistry:
+    """Loads each Vosk model once per process and shares it between all sessions.
+
+    Models are kept in least-recently-used order; when a load takes the total
+    past ``budget_mb`` the oldest models are dropped until it fits again (the
+    model just requested is always kept). Vosk models are safe to share between
+    recognizers, so callers only ever create cheap ``KaldiRecognizer`` objects.
+    """
+    def __init__(self, budget_mb=MODEL_BUDGET_MB):
+        self.budget_mb = budget_mb
+        self._models = collections.OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._load_locks = collections.defaultdict(threading.Lock)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_times = {}
+
+    def get(self, model_path=DEFAULT_MODEL_PATH):
+        model_path = os.path.abspath(model_path)
+        with self._lock:
+            if model_path in self._models:
+                self._models.move_to_end(model_path)
+                self.hits += 1
+                return self._models[model_path]
+            load_lock = self._load_locks[model_path]
+        # Only one thread loads a given model; the others wait and then hit
+        with load_lock:
+            with self._lock:
+                if model_path in self._models:
+                    self._models.move_to_end(model_path)
+                    self.hits += 1
+                    return self._models[model_path]
+                self.misses += 1
+            start = time.perf_counter()
+            model = _get_model(model_path)
+            load_time = time.perf_counter() - start
+            size = _model_size_mb(model_path)
+            logger.info("Loaded Vosk model %s (%.0f MB) in %.2fs", model_path, size, load_time)
+            with self._lock:
+                self._models[model_path] = model
+                self._sizes[model_path] = size
+                self.load_times[model_path] = load_time
+                self._evict(keep=model_path)
+            return model
+
+    def _evict(self, keep):
+        if self.budget_mb is None:
+            return
+        while sum(self._sizes.values()) > self.budget_mb and len(self._models) > 1:
+            oldest = next(path for path in self._models if path != keep)
+            del self._models[oldest]
+            del self._sizes[oldest]
+            self.evictions += 1
+            logger.info("Evicted Vosk model %s to stay under %.0f MB", oldest, self.budget_mb)
+
+    def preload(self, model_paths=(DEFAULT_MODEL_PATH,), background=True):
+        """Load models ahead of the first utterance, on a daemon thread by default."""
+        def load_all():
+            for model_path in model_paths:
+                try:
+                    self.get(model_path)
+                except Exception as e:
+                    logger.warning("Could not preload Vosk model %s: %s", model_path, e)
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="vosk-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "models": list(self._models),
+                "resident_mb": sum(self._sizes.values()),
+                "budget_mb": self.budget_mb,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "load_times_s": dict(self.load_times),
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_model_registry(budget_mb=MODEL_BUDGET_MB):
+    """Return the process-wide Vosk model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(budget_mb)
+        return _registry
+
+def _to_float(raw, sample_width):
+    """Decode little-endian PCM of any width to float32 on the 16-bit scale."""
+    if sample_width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) * 256
+    if sample_width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32)
+    if sample_width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        value = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        value = np.where(value & 0x800000, value - 0x1000000, value)
+        return value.astype(np.float32) / 256
+    if sample_width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 65536
+    raise ValueError(f"Unsupported WAV sample width: {8 * sample_width} bits")
+
+class StreamResampler:
+    """Block-by-block resampling to ``SAMPLE_RATE`` with state carried between blocks.
+
+    Downsampling first low-passes with a windowed-sinc FIR so nothing above the
+    new Nyquist frequency aliases into the speech band; the output samples are
+    then linearly interpolated. Both steps are vectorized over the block and
+    only ``taps`` input samples of history are kept.
+    """
+    def __init__(self, src_rate, dst_rate=SAMPLE_RATE, taps=63):
+        self.step = src_rate / dst_rate
+        self.pos = 0.0
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.fir = None
+        if src_rate > dst_rate:
+            cutoff = 0.45 * dst_rate / src_rate
+            n = np.arange(taps) - (taps - 1) / 2
+            fir = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+            self.fir = (fir / fir.sum()).astype(np.float32)
+            self.history = np.zeros(taps - 1, dtype=np.float32)
+
+    def process(self, samples):
+        if self.fir is not None:
+            buffered = np.concatenate((self.history, samples))
+            samples = np.convolve(buffered, self.fir, mode="valid")
+            self.history = buffered[-(len(self.fir) - 1):]
+        data = np.concatenate((self.tail, samples))
+        if len(data) < 2 or self.pos > len(data) - 1:
+            self.tail = data
+            return np.zeros(0, dtype=np.float32)
+        count = int((len(data) - 1 - self.pos) // self.step) + 1
+        positions = self.pos + self.step * np.arange(count)
+        index = positions.astype(np.int64)
+        frac = (positions - index).astype(np.float32)
+        out = data[index] * (1 - frac) + data[np.minimum(index + 1, len(data) - 1)] * frac
+        next_pos = self.pos + self.step * count
+        consumed = min(int(next_pos), len(data))
+        self.tail = data[consumed:]
+        self.pos = next_pos - consumed
+        return out
+
+def iter_wav_pcm(uploaded_file, block_frames=WAV_BLOCK_FRAMES):
+    """Stream a PCM WAV file of any rate, width and channel count as recognizer-ready chunks.
+
+    Frames are read ``block_frames`` at a time, downmixed to mono, converted to
+    16-bit and resampled to ``SAMPLE_RATE``, so memory stays bounded however
+    long the recording is. Files already in that format pass through untouched.
+    """
+    try:
+        wf = wave.open(uploaded_file, 'rb')
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"Could not read the uploaded .wav file: {e or 'not a WAV file'}") from e
+    with wf:
+        channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+        if width not in (1, 2, 3, 4):
+            raise ValueError(f"Unsupported WAV sample width: {8 * width} bits")
+        native = channels == 1 and width == SAMPLE_WIDTH and rate == SAMPLE_RATE
+        resampler = None if rate == SAMPLE_RATE else StreamResampler(rate)
+        while True:
+            raw = wf.readframes(block_frames)
+            if not raw:
+                break
+            if native:
+                yield raw
+                continue
+            samples = _to_float(raw, width)
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            if resampler is not None:
+                samples = resampler.process(samples)
+            if samples.size:
+                yield np.clip(np.round(samples), -32768, 32767).astype("<i2").tobytes()
+
 def record_audio(uploaded_file):
-    """Accept a WAV audio file (mono, 16kHz) and return raw audio bytes."""
-    with wave.open(uploaded_file, 'rb') as wf:
-        if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getframerate() != SAMPLE_RATE:
-            raise ValueError("Uploaded .wav file must be mono, 16-bit, 16kHz.")
-        audio_bytes = wf.readframes(wf.getnframes())
-    return audio_bytes
-
-def transcribe(audio_bytes, model_path=None):
+    """Accept a WAV audio file and return it as 16 kHz mono 16-bit PCM bytes."""
+    return b"".join(iter_wav_pcm(uploaded_file))
+
+def rechunk(blocks, chunk_ms=CHUNK_MS):
+    """Regroup PCM blocks of any size into fixed-length chunks, holding at most one chunk back."""
+    step = SAMPLE_RATE * SAMPLE_WIDTH * chunk_ms // 1000
+    buffer = bytearray()
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= step:
+            yield bytes(buffer[:step])
+            del buffer[:step]
+    if buffer:
+        yield bytes(buffer)
+
+def _frame_features(frames):
+    """Energy in dB (re 16-bit full scale samples) and zero-crossing rate of each frame."""
+    frames = frames.astype(np.float32)
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / frames.shape[1]
+    return energy_db, zcr
+
+def _speech_decision(energy_db, zcr, noise_db, max_db, margin_db, floor_db, fricative_zcr):
+    if max_db - noise_db < margin_db:
+        # No quiet stretch to learn the noise floor from: all speech or all silence
+        return energy_db > floor_db
+    voiced = energy_db > max(noise_db + margin_db, floor_db)
+    fricative = (energy_db > max(noise_db + margin_db / 2, floor_db)) & (zcr > fricative_zcr)
+    return voiced | fricative
+
+class StreamingVad:
+    """Per-frame speech/non-speech decision from energy and zero-crossing rate.
+
+    The noise floor is the 10th percentile of every frame seen so far, read
+    from a fixed histogram of frame energies, so the detector adapts to each
+    room without memory growing with the recording. ``floor_db`` (re 16-bit
+    full scale samples) is the level nothing quieter than counts as speech.
+    Voiced sounds clear the noise floor by ``margin_db``; quieter frames with
+    a high zero-crossing rate (the "s" of "sun" or "sat") count too, at half
+    the margin. Audio arrives in blocks; samples that do not fill a whole
+    frame wait for the next block.
+    """
+    HISTOGRAM_DB = (-20.0, 100.0)
+    BIN_DB = 0.5
+
+    def __init__(self, frame_ms=VAD_FRAME_MS, margin_db=10.0, floor_db=35.0, fricative_zcr=0.25):
+        self.frame_len = SAMPLE_RATE * frame_ms // 1000
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.fricative_zcr = fricative_zcr
+        low, high = self.HISTOGRAM_DB
+        self._histogram = np.zeros(int((high - low) / self.BIN_DB), dtype=np.int64)
+        self._max_db = -np.inf
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def _noise_db(self):
+        cumulative = np.cumsum(self._histogram)
+        index = int(np.searchsorted(cumulative, 0.1 * cumulative[-1]))
+        return self.HISTOGRAM_DB[0] + (index + 0.5) * self.BIN_DB
+
+    def process(self, samples):
+        """Split 16-bit samples into whole frames; return ``(frames, mask)``."""
+        data = np.concatenate((self._pending, samples)) if len(self._pending) else samples
+        count = len(data) // self.frame_len
+        self._pending = data[count * self.frame_len:]
+        frames = data[:count * self.frame_len].reshape(count, self.frame_len)
+        if count == 0:
+            return frames, np.zeros(0, dtype=bool)
+        energy_db, zcr = _frame_features(frames)
+        bins = ((np.clip(energy_db, *self.HISTOGRAM_DB) - self.HISTOGRAM_DB[0]) / self.BIN_DB).astype(np.int64)
+        self._histogram += np.bincount(np.minimum(bins, len(self._histogram) - 1), minlength=len(self._histogram))
+        self._max_db = max(self._max_db, float(energy_db.max()))
+        mask = _speech_decision(energy_db, zcr, self._noise_db(), self._max_db,
+                                self.margin_db, self.floor_db, self.fricative_zcr)
+        return frames, mask
+
+    def flush(self):
+        """The samples left over after the last whole frame."""
+        pending, self._pending = self._pending, np.zeros(0, dtype=np.int16)
+        return pending
+
+class SilenceTrimmer:
+    """Drops leading and trailing silence and shortens long pauses, block by block.
+
+    Speech is padded by ``pad_ms`` on both sides so word edges survive, and
+    pauses longer than ``max_gap_ms`` are cut down to that length, which still
+    gives Kaldi a word boundary. Silence is held back (at most ``max_gap_ms``
+    of it) until the next speech frame shows whether it is a pause or the end.
+    """
+    def __init__(self, frame_ms=VAD_FRAME_MS, pad_ms=200, max_gap_ms=500):
+        self.vad = StreamingVad(frame_ms)
+        self.pad = pad_ms // frame_ms
+        self._held = collections.deque(maxlen=max(max_gap_ms // frame_ms - self.pad, self.pad, 1))
+        self._since_speech = None
+        self.total_samples = 0
+        self.kept_samples = 0
+
+    @property
+    def skipped_s(self):
+        return (self.total_samples - self.kept_samples) / SAMPLE_RATE
+
+    def process(self, audio_bytes):
+        """Trim one block of 16-bit PCM; returns the PCM bytes to keep so far."""
+        samples = np.frombuffer(audio_bytes, dtype="<i2")
+        self.total_samples += len(samples)
+        frames, mask = self.vad.process(samples)
+        kept = []
+        for frame, speech in zip(frames, mask):
+            if speech:
+                held = list(self._held)
+                if self._since_speech is None:
+                    # Before the first word only the padding is kept
+                    held = held[len(held) - self.pad:] if self.pad else []
+                kept.extend(held)
+                kept.append(frame)
+                self._held.clear()
+                self._since_speech = 0
+            elif self._since_speech is not None and self._since_speech < self.pad:
+                kept.append(frame)
+                self._since_speech += 1
+            else:
+                self._held.append(frame)
+        return self._keep(kept)
+
+    def flush(self):
+        """PCM still owed at the end of the audio: the partial last frame, if it follows speech."""
+        tail = self.vad.flush()
+        in_speech = self._since_speech is not None and self._since_speech < self.pad
+        return self._keep([tail] if in_speech and len(tail) else [])
+
+    def _keep(self, frames):
+        if not frames:
+            return b""
+        kept = np.concatenate(frames)
+        self.kept_samples += len(kept)
+        return kept.astype("<i2", copy=False).tobytes()
+
+    def trim(self, blocks):
+        """Trim an iterable of PCM blocks, yielding the non-empty kept parts."""
+        for block in blocks:
+            kept = self.process(block)
+            if kept:
+                yield kept
+        tail = self.flush()
+        if tail:
+            yield tail
+
+def make_recognizer(model, grammar=None):
+    """A KaldiRecognizer, constrained to the phrases in ``grammar`` when given.
+
+    Anything outside the grammar decodes as ``[unk]`` instead of being forced
+    onto the nearest allowed word. Without a grammar the full open vocabulary
+    is used, as free-form tasks need.
+    """
+    if not grammar:
+        return vosk.KaldiRecognizer(model, SAMPLE_RATE)
+    phrases = sorted({phrase.lower() for phrase in grammar}) + [UNKNOWN_WORD]
+    return vosk.KaldiRecognizer(model, SAMPLE_RATE, json.dumps(phrases))
+
+def _clean(text):
+    return " ".join(word for word in text.lower().split() if word != UNKNOWN_WORD)
+
+def transcribe_stream(chunks, model_path=None, targets=None, on_partial=None, grammar=None):
+    """Decode PCM chunks incrementally with a single KaldiRecognizer.
+
+    ``on_partial(text)`` receives the running transcript after every chunk.
+    With ``targets`` decoding stops as soon as one of those words appears, even
+    in a partial result, so decode time follows when the child spoke rather
+    than how long the recording is. ``grammar`` restricts decoding to a task's
+    vocabulary (see ``make_recognizer``).
+    """
     if model_path is None:
-        model_path = os.path.join(os.path.dirname(__file__), "..", "models", "vosk-model-small-en-us-0.15")
-        model_path = os.path.abspath(model_path)
+        model_path = DEFAULT_MODEL_PATH
+    targets = {word.lower() for word in targets} if targets else set()
+
+    model = get_model_registry().get(model_path)
+    rec = make_recognizer(model, grammar)
+    start = time.perf_counter()
+    segments, partial, matched, decoded = [], "", None, 0
+    for chunk in chunks:
+        decoded += len(chunk)
+        if rec.AcceptWaveform(chunk):
+            segments.append(json.loads(rec.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(rec.PartialResult()).get("partial", "")
+        text = _clean(" ".join(segments + [partial]))
+        if on_partial is not None:
+            on_partial(text)
+        if targets:
+            matched = next((word for word in text.split() if word in targets), None)
+            if matched is not None:
+                break
+    else:
+        segments.append(json.loads(rec.FinalResult()).get("text", ""))
+        text = _clean(" ".join(segments))
+    return {
+        "text": text,
+        "matched": matched,
+        "audio_s": decoded / (SAMPLE_RATE * SAMPLE_WIDTH),
+        "decode_s": time.perf_counter() - start,
+    }
+
+class TranscriptCache:
+    """Transcripts keyed by a hash of the PCM bytes, model path, grammar and VAD setting.
+
+    A small in-memory LRU tier serves Streamlit reruns; with ``directory`` set,
+    entries are also written as JSON files there and the least recently used
+    ones are deleted once the directory grows past ``max_disk_mb``. Lookups
+    for the same key are serialized, so identical audio arriving twice at the
+    same time is still only decoded once. Results are handed out and stored
+    as copies, so callers may modify what they get back.
+    """
+    def __init__(self, max_entries=256, directory=TRANSCRIPT_CACHE_DIR, max_disk_mb=TRANSCRIPT_CACHE_MAX_MB):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_mb * 1024 * 1024
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(audio, model_path, grammar=None, vad=True):
+        """Hash PCM given as bytes or as an iterable of blocks, one block at a time."""
+        digest = hashlib.sha256()
+        for block in ([audio] if isinstance(audio, (bytes, bytearray, memoryview)) else audio):
+            digest.update(block)
+        digest.update(b"\0" + os.path.abspath(model_path).encode())
+        digest.update(b"\0" + json.dumps(sorted(phrase.lower() for phrase in grammar) if grammar else None).encode())
+        # Trimming silence can change the transcript and adds skipped_s
+        digest.update(b"\0vad" if vad else b"\0raw")
+        return digest.hexdigest()
+
+    def lock_for(self, key):
+        return self._key_locks[int(key[:8], 16) % len(self._key_locks)]
+
+    def get(self, key):
+        """Return ``(result, tier)`` with tier "memory" or "disk", or ``(None, None)``."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return dict(self._memory[key]), "memory"
+        path = self._path(key)
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    result = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                return None, None
+            self._remember(key, dict(result))
+            return result, "disk"
+        return None, None
+
+    def record(self, tier):
+        """Count a lookup as served from ``tier``, or as a miss when it is None."""
+        with self._lock:
+            if tier == "memory":
+                self.memory_hits += 1
+            elif tier == "disk":
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, result):
+        self._remember(key, dict(result))
+        path = self._path(key)
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(result, f)
+            self._evict_disk()
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json") if self.directory else None
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    st = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, name))
+        return entries
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+        if self.directory:
+            stats["disk_mb"] = sum(size for _, size, _ in self._disk_entries()) / (1024 * 1024)
+        return stats
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+def get_transcript_cache():
+    """Return the process-wide transcript cache."""
+    global _transcript_cache
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            _transcript_cache = TranscriptCache()
+        return _transcript_cache
+
+def _reusable(cached, targets):
+    """Whether a cached decode answers this request, and the result to return.
+
+    Complete decodes answer anything. A decode that stopped early on a target
+    word only answers requests that would have stopped on the same word.
+    """
+    targets = {word.lower() for word in targets} if targets else set()
+    if cached["matched"] is None:
+        matched = next((word for word in cached["text"].split() if word in targets), None)
+        return {**cached, "matched": matched}
+    if cached["matched"] in targets:
+        return cached
+    return None
+
+class AudioRingBuffer:
+    """Lock-free single-producer/single-consumer ring of 16-bit samples.
+
+    Only the audio callback advances ``write_pos`` and only the reader advances
+    ``read_pos``; each is published with a single attribute store after the
+    samples are copied, so neither side ever waits on the other. When the
+    reader falls a whole buffer behind, new samples are dropped and counted in
+    ``overruns`` instead of blocking the audio thread.
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self.write_pos = 0
+        self.read_pos = 0
+        self.overruns = 0
+
+    @property
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def write(self, samples):
+        count = min(len(samples), self.capacity - self.available)
+        self.overruns += len(samples) - count
+        start = self.write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:count]
+        self.write_pos += count
+
+    def read(self, max_samples):
+        count = min(self.available, max_samples)
+        start = self.read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        out = np.concatenate((self._data[start:start + first], self._data[:count - first]))
+        self.read_pos += count
+        return out
+
+def listen_and_transcribe(model_path=None, targets=None, on_partial=None, grammar=None,
+                          max_duration_s=MAX_LISTEN_S, end_of_speech_s=END_OF_SPEECH_S,
+                          min_speech_s=MIN_SPEECH_S, device=None):
+    """Transcribe live microphone audio, returning as soon as the child stops talking.
+
+    The sounddevice callback only copies blocks into an ``AudioRingBuffer``;
+    this thread drains it into an incremental recognizer and a ``StreamingVad``.
+    Listening ends after ``end_of_speech_s`` of non-speech frames once at least
+    ``min_speech_s`` of speech has been heard (so a cough or breath does not
+    end it early), when a target word is heard, or after ``max_duration_s``.
+    """
+    try:
+        import sounddevice as sd
+    except (ImportError, OSError) as e:
+        raise RuntimeError(f"Live recording needs sounddevice and the PortAudio library: {e}") from e
+
+    ring = AudioRingBuffer(int(SAMPLE_RATE * max_duration_s) + SAMPLE_RATE)
+    chunk = SAMPLE_RATE * CHUNK_MS // 1000
+    vad = StreamingVad()
+    quiet_frames_needed = max(1, round(1000 * end_of_speech_s / VAD_FRAME_MS))
+    speech_frames_needed = max(1, round(1000 * min_speech_s / VAD_FRAME_MS))
+    state = {"speech_frames": 0, "quiet_frames": 0}
+
+    def callback(indata, frames, time_info, status):
+        ring.write(indata[:, 0])
+
+    def ended(samples):
+        _, speech = vad.process(samples)
+        for is_speech in speech:
+            if is_speech:
+                state["speech_frames"] += 1
+                state["quiet_frames"] = 0
+            elif state["speech_frames"] >= speech_frames_needed:
+                state["quiet_frames"] += 1
+        return state["quiet_frames"] >= quiet_frames_needed
+
+    def chunks():
+        start = time.monotonic()
+        while time.monotonic() - start < max_duration_s:
+            if ring.available < chunk:
+                time.sleep(CHUNK_MS / 4000)
+                continue
+            samples = ring.read(chunk)
+            yield samples.tobytes()
+            if ended(samples):
+                return
+
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="int16", blocksize=chunk // 4,
+                        device=device, callback=callback):
+        result = transcribe_stream(chunks(), model_path, targets, on_partial, grammar)
+    result["overruns"] = ring.overruns
+    result["speech_heard"] = state["speech_frames"] >= speech_frames_needed
+    return result
+
+def transcribe_blocks(open_blocks, model_path=None, targets=None, on_partial=None, grammar=None, vad=True):
+    """``transcribe_stream`` over a complete recording, never decoding the same audio twice.
+
+    ``open_blocks()`` returns a fresh iterator over the recording as 16 kHz
+    mono 16-bit PCM blocks. It is read once to hash the audio for the cache and,
+    on a miss, once more to decode, so the recording is never held in memory
+    whole. With ``vad`` silence is trimmed on the way to the recognizer and the
+    result reports it as ``skipped_s`` (of the audio read before decoding stopped).
+    """
+    if model_path is None:
+        model_path = DEFAULT_MODEL_PATH
+    cache = get_transcript_cache()
+    key = cache.key(open_blocks(), model_path, grammar, vad)
+    with cache.lock_for(key):
+        cached, tier = cache.get(key)
+        result = _reusable(cached, targets) if cached is not None else None
+        cache.record(tier if result is not None else None)
+        if result is not None:
+            if on_partial is not None:
+                on_partial(result["text"])
+            return result
+        blocks = open_blocks()
+        trimmer = SilenceTrimmer() if vad else None
+        if trimmer is not None:
+            blocks = trimmer.trim(blocks)
+        result = transcribe_stream(rechunk(blocks), model_path, targets, on_partial, grammar)
+        result["skipped_s"] = trimmer.skipped_s if trimmer is not None else 0.0
+        cache.put(key, result)
+    return result
+
+def transcribe_bytes(audio_bytes, model_path=None, targets=None, on_partial=None, grammar=None, vad=True):
+    """``transcribe_blocks`` over PCM already in memory."""
+    return transcribe_blocks(lambda: [audio_bytes], model_path, targets, on_partial, grammar, vad)
+
+def transcribe_upload(uploaded_file, model_path=None, targets=None, on_partial=None, grammar=None, vad=True):
+    """``transcribe_blocks`` streaming straight from a seekable WAV upload."""
+    def open_blocks():
+        uploaded_file.seek(0)
+        return iter_wav_pcm(uploaded_file)
+    return transcribe_blocks(open_blocks, model_path, targets, on_partial, grammar, vad)
 
-    model = _get_model(model_path)
-    rec = vosk.KaldiRecognizer(model, SAMPLE_RATE)
-    rec.AcceptWaveform(audio_bytes)
-    result = json.loads(rec.FinalResult())
-    return result.get("text", "").lower()
+def transcribe(audio_bytes, model_path=None, grammar=None):
+    return transcribe_bytes(audio_bytes, model_path, grammar=grammar)["text"]
 
-def record_and_transcribe(uploaded_file, model_path=None):
-    """Takes an uploaded .wav file, returns transcribed text"""
-    audio_bytes = record_audio(uploaded_file)
-    return transcribe(audio_bytes, model_path=model_path)
+def record_and_transcribe(uploaded_file=None, model_path=None, targets=None, on_partial=None, grammar=None):
+    """Takes an uploaded .wav file, or listens on the microphone without one, returns transcribed text"""
+    if uploaded_file is None:
+        return listen_and_transcribe(model_path, targets, on_partial, grammar)["text"]
+    return transcribe_upload(uploaded_file, model_path, targets, on_partial, grammar)["text"]